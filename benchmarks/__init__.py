@@ -0,0 +1,5 @@
+"""
+Benchmarks measuring the performance of tidysic on synthetic libraries.
+
+Each module can be run with `python -m benchmarks.<name> --help`.
+"""
@@ -0,0 +1,49 @@
+"""
+Compares the throughput of each strategy of the copy backend, copying a file within
+the given directory, which should be on the filesystem of interest.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from tidysic.copy_backend import CopyBackend, CopyStrategy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--directory", type=Path, default=None)
+    parser.add_argument("--size", type=int, default=256, help="in MiB")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory(dir=args.directory) as directory:
+        source = Path(directory) / "source"
+        with open(source, "wb") as file:
+            for _ in range(args.size):
+                file.write(os.urandom(1024 * 1024))
+
+        for strategy in CopyStrategy:
+            backend = CopyBackend(link=strategy is CopyStrategy.HARDLINK)
+            # Only keep the strategy being measured, and the fallback.
+            backend._strategies = [
+                (name, function)
+                for name, function in backend._strategies
+                if name is strategy
+            ]
+
+            start = time.perf_counter()
+            for index in range(args.repeat):
+                backend.copy(source, Path(directory) / f"{strategy.value} {index}")
+            elapsed = (time.perf_counter() - start) / args.repeat
+
+            used = ", ".join(name.value for name in backend.counts)
+            print(
+                f"{strategy.value:>16} {elapsed * 1000:>10.1f} ms"
+                f" {args.size / elapsed:>10.0f} MiB/s   (used: {used})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Measures the number of target paths rendered per second with the default structure,
+rendering every step for each file, then using the memoized folder paths.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from tidysic.file.taggable import Taggable
+from tidysic.settings.structure import Structure
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    structure = Structure.get_default()
+    formatted_strings = [step.formatted_string for step in structure.folders]
+    formatted_strings.append(structure.track_format)
+    taggables = [
+        Taggable(
+            artist=f"Artist {i % 50}",
+            album=f"Album {i % 7}",
+            title=f"Title {i}",
+            tracknumber=f"{i % 12 + 1}/12" if i % 2 else str(i % 12 + 1),
+            date=None if i % 5 == 0 else str(1970 + i % 40),
+        )
+        for i in range(1000)
+    ]
+
+    start = time.perf_counter()
+    for i in range(args.paths):
+        taggable = taggables[i % len(taggables)]
+        Path(*[string.write(taggable) for string in formatted_strings])
+    report("every step", args.paths, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(args.paths):
+        taggable = taggables[i % len(taggables)]
+        structure.folder_path(taggable) / structure.track_format.write(taggable)
+    report("memoized", args.paths, time.perf_counter() - start)
+
+
+def report(name: str, count: int, elapsed: float) -> None:
+    rate = count / elapsed
+    print(f"{name:>12} {count} paths in {elapsed:.3f} s ({rate:.0f} paths/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures the time taken to import the CLI, which is paid by every invocation of
+tidysic before doing anything, and lists the slowest modules it imports.
+"""
+import argparse
+import subprocess
+import sys
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Imports the given module in a new interpreter, and returns the cumulative import
+    time of each module it imported, in microseconds.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="tidysic.main")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=150.0,
+        help="Fails if the fastest import takes longer, in milliseconds.",
+    )
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    fastest = min(runs, key=lambda times: times[args.module])
+    elapsed = fastest[args.module] / 1000
+    print(f"{args.module} imported in {elapsed:.1f} ms (fastest of {args.runs} runs)")
+
+    slowest = sorted(fastest.items(), key=lambda item: -item[1])
+    # The first one is the measured module itself.
+    for name, cumulative in slowest[1 : args.top + 1]:  # noqa: E203
+        print(f"{cumulative / 1000:8.1f} ms  {name}")
+
+    if elapsed > args.threshold:
+        sys.exit(f"Import time exceeds the threshold of {args.threshold} ms.")
+
+
+if __name__ == "__main__":
+    main()
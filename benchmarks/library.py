@@ -0,0 +1,37 @@
+"""
+Generation of synthetic music libraries used by the benchmarks.
+"""
+import shutil
+from pathlib import Path
+
+from mutagen.easyid3 import EasyID3
+
+SAMPLE = Path(__file__).parent.parent / "tests" / "music" / "normal" / "normal.mp3"
+
+
+def build_library(root: Path, artists: int, albums: int, tracks: int) -> int:
+    """
+    Fills `root` with `artists` folders of `albums` folders of `tracks` tagged mp3
+    files each, along with one cover per album.
+
+    Returns:
+        int: Number of audio files created.
+    """
+    count = 0
+    for artist in range(artists):
+        for album in range(albums):
+            folder = root / f"artist {artist}" / f"album {album}"
+            folder.mkdir(parents=True, exist_ok=True)
+            (folder / "cover.jpg").write_bytes(b"\0" * 64)
+            for track in range(tracks):
+                path = folder / f"track {track}.mp3"
+                shutil.copyfile(SAMPLE, path)
+                tags = EasyID3(path)  # type: ignore
+                tags["artist"] = f"Artist {artist}"
+                tags["album"] = f"Album {album}"
+                tags["title"] = f"Title {track}"
+                tags["tracknumber"] = str(track + 1)
+                tags["date"] = str(1970 + album)
+                tags.save()  # type: ignore
+                count += 1
+    return count
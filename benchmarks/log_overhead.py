@@ -0,0 +1,70 @@
+"""
+Measures the overhead of logging the operations at the default WARN level, when the
+messages are built eagerly and thrown away, and when they are deferred.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from tidysic.copy_backend import CopyBackend
+from tidysic.file.tagged_file import TaggedFile
+from tidysic.logger import Logger, Text
+from tidysic.organizer import _Operation
+
+log = Logger()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    operations = [
+        _Operation(
+            TaggedFile(Path(f"/source/artist/album/track {i}.mp3")),
+            Path(f"/target/Artist/Album/{i:02}. Title {i}.mp3"),
+            dry_run=True,
+        )
+        for i in range(1000)
+    ]
+    backend = CopyBackend()
+
+    def eager(operation: _Operation) -> None:
+        log.info(
+            Text.assemble(
+                "Copying file ",
+                (operation.file.path.name, "path"),
+                " to ",
+                (str(operation.target), "path"),
+                ".",
+            )
+        )
+
+    def lazy(operation: _Operation) -> None:
+        log.info(
+            lambda: Text.assemble(
+                "Copying file ",
+                (operation.file.path.name, "path"),
+                " to ",
+                (str(operation.target), "path"),
+                ".",
+            )
+        )
+
+    for name, function in (
+        ("eager", eager),
+        ("lazy", lazy),
+        ("dry-run copy", lambda operation: operation.copy(backend)),
+    ):
+        start = time.perf_counter()
+        for i in range(args.operations):
+            function(operations[i % len(operations)])
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>12} {elapsed / args.operations * 1e9:8.0f} ns/operation "
+            f"({args.operations} operations in {elapsed:.3f} s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Measures the memory used per audio file once its tags are parsed, for a synthetic
+library whose tags repeat across the tracks of each album.
+"""
+import argparse
+import tracemalloc
+from pathlib import Path
+
+from tidysic.file.audio_file import AudioFile
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artists", type=int, default=100)
+    parser.add_argument("--albums", type=int, default=10)
+    parser.add_argument("--tracks", type=int, default=12)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    files = []
+    for artist in range(args.artists):
+        for album in range(args.albums):
+            folder = Path("library", f"artist {artist}", f"album {album}")
+            for track in range(args.tracks):
+                # Tags are built anew for each file, as when read from its headers.
+                tags = {
+                    "artist": f"Artist {artist}",
+                    "album": f"Album {album}",
+                    "title": f"Title {track}",
+                    "genre": "".join(["Ro", "ck"]),
+                    "tracknumber": str(track + 1),
+                    "date": str(1970 + album),
+                }
+                files.append(AudioFile(folder / f"track {track}.mp3", tags))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"{len(files)} files, {used / len(files):.0f} bytes per file")
+
+
+if __name__ == "__main__":
+    main()
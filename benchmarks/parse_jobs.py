@@ -0,0 +1,55 @@
+"""
+Measures how the throughput of `Tree` scales with the number of concurrent tag reads.
+
+Local disks answer too quickly to show the effect of concurrency, so the `--latency`
+option delays every tag read to emulate the open latency of network storage.
+"""
+import argparse
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Optional
+
+from benchmarks.library import build_library
+from tidysic.file import audio_file
+from tidysic.parser import Tree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artists", type=int, default=10)
+    parser.add_argument("--albums", type=int, default=5)
+    parser.add_argument("--tracks", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=2.0, help="in milliseconds")
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    read_tags = audio_file.read_tags
+
+    def delayed_read_tags(path: Path) -> Optional[dict[str, str]]:
+        time.sleep(args.latency / 1000)
+        return read_tags(path)
+
+    # Looked up by the module of `AudioFile` each time a file is read.
+    audio_file.read_tags = delayed_read_tags
+
+    with TemporaryDirectory() as directory:
+        root = Path(directory)
+        count = build_library(root, args.artists, args.albums, args.tracks)
+        print(f"{count} audio files, {args.latency} ms of latency per read")
+        print(f"{'jobs':>6} {'seconds':>10} {'files/s':>10} {'speedup':>10}")
+
+        baseline = None
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            Tree(root, jobs)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(
+                f"{jobs:>6} {elapsed:>10.3f} {count / elapsed:>10.0f}"
+                f" {baseline / elapsed:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Measures the cost of scanning a synthetic library whose tags are all in the tag cache,
+so that the parsing is dominated by listing directories and querying file metadata.
+
+The number of calls to `os.stat` and `os.lstat`, through which `pathlib` queries
+metadata, is reported per file. Calls to `os.DirEntry.stat` cannot be intercepted, and
+amount to one per file.
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable
+
+from benchmarks.library import build_library
+from tidysic.file.tag_cache import TagCache
+from tidysic.parser import Tree
+
+calls: Counter[str] = Counter()
+
+
+def counted(name: str, function: Callable[..., Any]) -> Callable[..., Any]:
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        calls[name] += 1
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artists", type=int, default=100)
+    parser.add_argument("--albums", type=int, default=10)
+    parser.add_argument("--tracks", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        root = Path(directory) / "library"
+        count = build_library(root, args.artists, args.albums, args.tracks)
+        files = count + args.artists * args.albums
+        cache = TagCache(Path(directory) / TagCache.filename)
+        Tree(root, cache=cache)
+
+        os.stat = counted("stat", os.stat)
+        os.lstat = counted("lstat", os.lstat)
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            calls.clear()
+            start = time.perf_counter()
+            Tree(root, cache=cache)
+            best = min(best, time.perf_counter() - start)
+
+        print(f"{files} files, best of {args.repeat}: {best:.3f} s")
+        print(f"{files / best:.0f} files/s")
+        for name in ("stat", "lstat"):
+            print(f"os.{name}: {calls[name] / files:.2f} call(s) per file")
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
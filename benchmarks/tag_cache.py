@@ -0,0 +1,40 @@
+"""
+Compares the duration of parsing a synthetic library without cache, with an empty tag
+cache, and with a warm tag cache.
+"""
+import argparse
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from benchmarks.library import build_library
+from tidysic.file.tag_cache import TagCache
+from tidysic.parser import Tree
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--artists", type=int, default=20)
+    parser.add_argument("--albums", type=int, default=5)
+    parser.add_argument("--tracks", type=int, default=12)
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as directory:
+        root = Path(directory) / "library"
+        count = build_library(root, args.artists, args.albums, args.tracks)
+        database = Path(directory) / TagCache.filename
+        print(f"{count} audio files")
+
+        for name in ("no cache", "cold cache", "warm cache"):
+            cache = None if name == "no cache" else TagCache(database)
+            start = time.perf_counter()
+            Tree(root, cache=cache)
+            if cache is not None:
+                cache.prune(root)
+                cache.close()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>12} {elapsed:>8.3f} s {count / elapsed:>10.0f} files/s")
+
+
+if __name__ == "__main__":
+    main()
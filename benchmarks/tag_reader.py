@@ -0,0 +1,133 @@
+"""
+Compares the number of files whose tags are read per second by the header-only tag
+reader and by mutagen, for each supported format.
+"""
+import argparse
+import shutil
+import struct
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Callable
+
+import mutagen
+from benchmarks.library import SAMPLE
+from mutagen.easyid3 import EasyID3
+from tidysic.file.tag_reader import read_tags
+
+TAGS = {
+    "album": "Album",
+    "artist": "Artist",
+    "title": "Title",
+    "genre": "Rock",
+    "tracknumber": "3",
+    "date": "1999",
+}
+
+# Size of the audio payload following the headers of the synthetic files.
+PAYLOAD = b"\0" * 256 * 1024
+
+
+def vorbis_comment() -> bytes:
+    comments = [f"{name.upper()}={value}".encode() for name, value in TAGS.items()]
+    data = struct.pack("<I", 6) + b"vendor" + struct.pack("<I", len(comments))
+    return data + b"".join(struct.pack("<I", len(c)) + c for c in comments)
+
+
+def write_mp3(path: Path) -> None:
+    shutil.copyfile(SAMPLE, path)
+    tags = EasyID3(path)  # type: ignore
+    tags.update(TAGS)
+    tags.save()  # type: ignore
+    with open(path, "ab") as file:
+        file.write(PAYLOAD)
+
+
+def write_flac(path: Path) -> None:
+    # 44.1 kHz, stereo, 16 bits.
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\0" * 6
+    streaminfo += bytes([0x0A, 0xC4, 0x42, 0xF0]) + b"\0" * 20
+    comment = vorbis_comment()
+    path.write_bytes(
+        b"fLaC"
+        + b"\x00" + len(streaminfo).to_bytes(3, "big") + streaminfo
+        + b"\x84" + len(comment).to_bytes(3, "big") + comment
+        + PAYLOAD
+    )
+
+
+def ogg_page(sequence: int, packets: list[bytes], flags: int = 0) -> bytes:
+    lacing = b"".join(
+        b"\xff" * (len(packet) // 255) + bytes([len(packet) % 255])
+        for packet in packets
+    )
+    header = b"OggS\0" + bytes([flags]) + struct.pack("<qII", 0, 1, sequence)
+    return header + b"\0\0\0\0" + bytes([len(lacing)]) + lacing + b"".join(packets)
+
+
+def write_ogg(path: Path) -> None:
+    identification = b"\x01vorbis" + struct.pack("<IBIiii", 0, 2, 44100, 0, 0, 0)
+    identification += b"\xb8\x01"
+    setup = b"\x05vorbis" + b"\0" * 32
+    path.write_bytes(
+        ogg_page(0, [identification], flags=2)
+        + ogg_page(1, [b"\x03vorbis" + vorbis_comment() + b"\x01", setup])
+        + ogg_page(2, [PAYLOAD[:255 * 200]], flags=4)
+    )
+
+
+def write_wav(path: Path) -> None:
+    info = b"INFO"
+    for identifier, value in ((b"INAM", "title"), (b"IART", "artist")):
+        data = TAGS[value].encode() + b"\0"
+        info += identifier + struct.pack("<I", len(data)) + data
+        info += b"\0" * (len(data) % 2)
+    fmt = struct.pack("<HHIIHH", 1, 2, 44100, 176400, 4, 16)
+    chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    chunks += b"data" + struct.pack("<I", len(PAYLOAD)) + PAYLOAD
+    chunks += b"LIST" + struct.pack("<I", len(info)) + info
+    path.write_bytes(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+
+
+WRITERS: dict[str, Callable[[Path], None]] = {
+    ".mp3": write_mp3,
+    ".flac": write_flac,
+    ".ogg": write_ogg,
+    ".wav": write_wav,
+}
+
+
+def read_mutagen(path: Path) -> None:
+    mutagen.File(path, easy=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    args = parser.parse_args()
+
+    readers: dict[str, Callable[[Path], object]] = {
+        "header": read_tags,
+        "mutagen": read_mutagen,
+    }
+    with TemporaryDirectory() as directory:
+        print(f"{'format':>8} " + " ".join(f"{name:>16}" for name in readers))
+        for extension, write in WRITERS.items():
+            paths = [Path(directory) / f"{i}{extension}" for i in range(args.files)]
+            for path in paths:
+                write(path)
+
+            rates = []
+            for read in readers.values():
+                start = time.perf_counter()
+                for path in paths:
+                    read(path)
+                rates.append(len(paths) / (time.perf_counter() - start))
+            print(
+                f"{extension:>8} "
+                + " ".join(f"{rate:>10.0f} files/s" for rate in rates)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from tidysic.settings.structure import Structure
+
+
+@pytest.fixture
+def structure() -> Structure:
+    return Structure.parse("artist {{artist}}\nalbum {*{album}}\n{{title}}")
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    """
+    Copy of the "clutter test" library, which the test is free to modify.
+    """
+    source = tmp_path / "source"
+    shutil.copytree("tests/music/clutter test", source)
+    return source
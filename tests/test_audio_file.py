@@ -1,5 +1,9 @@
+import shutil
 from pathlib import Path
 
+import pytest
+from mutagen.easyid3 import EasyID3
+from tidysic.file import audio_file as audio_file_module
 from tidysic.file.audio_file import AudioFile
 
 path = Path('tests/music/normal/normal.mp3')
@@ -13,3 +17,18 @@ def test_audio_file_extension():
 def test_is_audio_file():
     assert AudioFile.is_audio_file(path)
     assert not AudioFile.is_audio_file(Path('tests/music/normal'))
+
+
+def test_mutagen_extra_tags(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    copy = tmp_path / "normal.mp3"
+    shutil.copyfile(path, copy)
+    id3 = EasyID3(copy)
+    id3["albumartist"] = "Album Artist"
+    id3["composer"] = "Composer"
+    id3.save()
+
+    # Falls back to mutagen, as for the frames the header-only reader rejects.
+    monkeypatch.setattr(audio_file_module, "read_tags", lambda path: None)
+    parsed = AudioFile(copy)
+    assert parsed.title == audio_file.title
+    assert parsed.artist == audio_file.artist
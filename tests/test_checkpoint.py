@@ -0,0 +1,60 @@
+import shutil
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from tidysic.checkpoint import Checkpoint
+from tidysic.file.taggable import Taggable
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.settings.structure import Structure
+
+
+def test_checkpoint(tmp_path: Path):
+    path = tmp_path / Checkpoint.filename
+    checkpoint = Checkpoint(path)
+    checkpoint.complete(tmp_path / "a", Taggable(artist="Artist"))
+    checkpoint.complete(tmp_path / "b", None)
+    checkpoint.close(finished=False)
+
+    with open(path, "a") as file:
+        file.write('{"path": "cut sh')
+
+    checkpoint = Checkpoint(path)
+    assert checkpoint.get(tmp_path / "a") == (True, Taggable(artist="Artist"))
+    assert checkpoint.get(tmp_path / "b") == (True, None)
+    assert checkpoint.get(tmp_path / "c") == (False, None)
+    checkpoint.close(finished=True)
+    assert not path.exists()
+
+
+def test_resume(tmp_path: Path, source: Path, structure: Structure):
+    target = tmp_path / "target"
+    path = tmp_path / Checkpoint.filename
+
+    def interrupted(nodes: Iterator[Tree]) -> Iterator[Tree]:
+        yield next(nodes)
+        raise KeyboardInterrupt()
+
+    organizer = Organizer(structure, move=False, dry_run=False)
+    checkpoint = Checkpoint(path)
+    with pytest.raises(KeyboardInterrupt):
+        nodes = Tree.unparsed(source).walk(checkpoint=checkpoint)
+        organizer.organize_stream(interrupted(nodes), target, checkpoint)
+    checkpoint.close(finished=False)
+
+    album = target / "Artist Name" / "Album Name"
+    assert len(list(album.iterdir())) == 3
+    shutil.rmtree(album)
+
+    organizer = Organizer(structure, move=False, dry_run=False)
+    checkpoint = Checkpoint(path)
+    tree = Tree.unparsed(source)
+    nodes = tree.walk(checkpoint=checkpoint)
+    organizer.organize_stream(nodes, target, checkpoint)
+    checkpoint.close(finished=True)
+
+    assert not album.exists()
+    assert len(list((target / "Artist Name" / "Unknown album").iterdir())) == 3
+    assert tree.common_tags is not None
+    assert tree.common_tags.artist == "Artist Name"
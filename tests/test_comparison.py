@@ -0,0 +1,99 @@
+import os
+from pathlib import Path
+
+import pytest
+from tidysic.comparison import Comparator
+from tidysic.copy_backend import CopyBackend
+from tidysic.file.hash_cache import HashCache
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.policies import Comparison
+from tidysic.settings.structure import Structure
+
+
+@pytest.fixture
+def copied(tmp_path: Path) -> tuple[Path, Path]:
+    source = tmp_path / "source"
+    source.write_bytes(os.urandom(3 * 1024 * 1024))
+    target = tmp_path / "target"
+    CopyBackend().copy(source, target)
+    return source, target
+
+
+def test_metadata(copied: tuple[Path, Path]):
+    source, target = copied
+    comparator = Comparator(Comparison.METADATA)
+    assert comparator.unchanged(source, target)
+
+    os.utime(source, ns=(0, 0))
+    assert not comparator.unchanged(source, target)
+    assert not comparator.unchanged(source, target.with_name("missing"))
+    assert comparator.skipped == {"files": 1, "bytes": 3 * 1024 * 1024}
+
+
+@pytest.mark.parametrize("comparison", [Comparison.SAMPLED, Comparison.FULL])
+def test_hash(copied: tuple[Path, Path], comparison: Comparison):
+    source, target = copied
+    comparator = Comparator(comparison)
+
+    # A touched file is not copied again, but its target gets its modification time.
+    os.utime(source, ns=(0, 0))
+    assert comparator.unchanged(source, target)
+    assert target.stat().st_mtime_ns == 0
+
+    with open(source, "r+b") as file:
+        file.write(b"modified")
+    os.utime(source, ns=(0, 0))
+    assert not comparator.unchanged(source, target)
+
+
+def test_hash_dry_run(copied: tuple[Path, Path]):
+    source, target = copied
+    cache = HashCache(None)
+    os.utime(source, ns=(0, 0))
+    mtime = target.stat().st_mtime_ns
+
+    assert Comparator(Comparison.FULL, cache, dry_run=True).unchanged(source, target)
+    assert target.stat().st_mtime_ns == mtime
+    assert cache.get(source.stat(), "full") is None
+    cache.close()
+
+
+def test_full_hash_middle(copied: tuple[Path, Path]):
+    source, target = copied
+    with open(source, "r+b") as file:
+        file.seek(100_000)
+        file.write(b"modified")
+    os.utime(source, ns=(0, 0))
+    os.utime(target, ns=(0, 0))
+
+    assert Comparator(Comparison.METADATA).unchanged(source, target)
+    assert not Comparator(Comparison.FULL).unchanged(source, target)
+
+
+def test_hash_cache(copied: tuple[Path, Path]):
+    source, target = copied
+    cache = HashCache(None)
+    assert Comparator(Comparison.FULL, cache).unchanged(source, target)
+    digest = cache.get(source.stat(), "full")
+    assert digest is not None and cache.get(target.stat(), "full") == digest
+
+    # Cached hashes are used as long as the size and modification time match.
+    stat = source.stat()
+    cache.put(stat, "full", b"other")
+    assert not Comparator(Comparison.FULL, cache).unchanged(source, target)
+    cache.close()
+
+
+def test_organize_skip_unchanged(tmp_path: Path, source: Path, structure: Structure):
+    Organizer(structure, move=False, dry_run=False).organize(
+        Tree(source), tmp_path / "target"
+    )
+
+    comparator = Comparator(Comparison.METADATA)
+    organizer = Organizer(structure, move=False, dry_run=False, comparator=comparator)
+    organizer.organize(Tree(source), tmp_path / "target")
+
+    assert organizer.statistics["skipped"] == 5
+    assert organizer.statistics["copied"] == 1
+    assert comparator.skipped["files"] == 7
@@ -0,0 +1,61 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from tidysic.copy_backend import CopyBackend, CopyStrategy
+
+
+def test_copy(tmp_path: Path):
+    source = tmp_path / "source"
+    source.write_bytes(b"content" * 1000)
+    target = tmp_path / "target"
+    target.write_bytes(b"previous content, longer than the new one" * 1000)
+
+    backend = CopyBackend()
+    backend.copy(source, target)
+
+    assert target.read_bytes() == source.read_bytes()
+    assert source.stat().st_ino != target.stat().st_ino
+    assert source.stat().st_mtime_ns == target.stat().st_mtime_ns
+    assert sum(backend.counts.values()) == 1
+    assert CopyStrategy.HARDLINK not in backend.counts
+
+
+def test_link(tmp_path: Path):
+    source = tmp_path / "source"
+    source.write_bytes(b"content")
+    target = tmp_path / "target"
+    target.write_bytes(b"previous content")
+
+    backend = CopyBackend(link=True)
+    backend.copy(source, target)
+
+    assert source.stat().st_ino == target.stat().st_ino
+    assert backend.counts == {CopyStrategy.HARDLINK: 1}
+    assert {path.name for path in tmp_path.iterdir()} == {"source", "target"}
+
+
+def test_link_again(tmp_path: Path):
+    source = tmp_path / "source"
+    source.write_bytes(b"content")
+    target = tmp_path / "target"
+    # Interrupted before replacing the target.
+    (tmp_path / "target.tidysic-link").write_bytes(b"stale")
+
+    for _ in range(3):
+        backend = CopyBackend(link=True)
+        backend.copy(source, target)
+        assert backend.counts == {CopyStrategy.HARDLINK: 1}
+
+    assert source.stat().st_ino == target.stat().st_ino
+    assert {path.name for path in tmp_path.iterdir()} == {"source", "target"}
+
+
+def test_copy_onto_link(tmp_path: Path):
+    source = tmp_path / "source"
+    source.write_bytes(b"content")
+    CopyBackend(link=True).copy(source, tmp_path / "target")
+
+    with pytest.raises(shutil.SameFileError):
+        CopyBackend().copy(source, tmp_path / "target")
+    assert source.read_bytes() == b"content"
@@ -0,0 +1,50 @@
+import os
+import shutil
+from pathlib import Path
+
+from mutagen.easyid3 import EasyID3
+from tidysic.duplicates import find_duplicates, remove_duplicates, select_kept
+from tidysic.file.audio_file import AudioFile
+from tidysic.parser import Tree
+from tidysic.policies import DuplicatePolicy
+
+
+def write_track(path: Path, payload: bytes, **tags: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\xff\xfb" + payload)
+    id3 = EasyID3()
+    id3.update(tags)
+    id3.save(path)
+    return path
+
+
+def test_find_duplicates(tmp_path: Path):
+    payload = os.urandom(200_000)
+    paths = [
+        write_track(tmp_path / "a.mp3", payload, title="A"),
+        write_track(tmp_path / "b.mp3", payload, title="B", artist="Artist"),
+        # Same size and start, but a different end.
+        write_track(tmp_path / "c.mp3", payload[:-1] + b"\0", title="A"),
+        write_track(tmp_path / "d.mp3", payload[:1000], title="A"),
+    ]
+    os.utime(paths[0], ns=(0, 2**62))
+    files = [AudioFile(path) for path in paths]
+
+    groups = find_duplicates(files, jobs=2)
+    assert [{file.path.name for file in group} for group in groups] == [
+        {"a.mp3", "b.mp3"}
+    ]
+    assert select_kept(groups[0], DuplicatePolicy.TAGGED).path.name == "b.mp3"
+    assert select_kept(groups[0], DuplicatePolicy.NEWEST).path.name == "a.mp3"
+
+
+def test_remove_duplicates(tmp_path: Path):
+    shutil.copytree("tests/music/normal", tmp_path / "first")
+    shutil.copytree("tests/music/normal", tmp_path / "second")
+    id3 = EasyID3(tmp_path / "second" / "normal.mp3")
+    id3["title"] = "Other title"
+    id3.save()
+
+    tree = Tree(tmp_path)
+    assert remove_duplicates(tree, DuplicatePolicy.NEWEST) == 1
+    assert sum(len(node.audio_files) for node in tree.nodes()) == 1
@@ -43,3 +43,9 @@ def test_rich_tracknumber():
     fs = FormattedString("{{tracknumber:02d}}")
     tagged = Taggable(tracknumber="03/12")
     assert fs.write(tagged) == "03"
+
+
+def test_constant_units():
+    fs = FormattedString("[{({date}) }{*{tracknumber}}] - ")
+    assert fs.write(Taggable(tracknumber="4/12")) == "[4] - "
+    assert fs.write(Taggable(date="1999")) == "[(1999) Unknown tracknumber] - "
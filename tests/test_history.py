@@ -0,0 +1,64 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from tidysic.exceptions import CollisionException
+from tidysic.history import History
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.settings.structure import Structure
+
+
+@pytest.fixture
+def structure() -> Structure:
+    # Without albums, so that the files of the whole source land in one directory.
+    return Structure.parse("artist {{artist}}\n{{title}}")
+
+
+def test_history(tmp_path: Path):
+    source = tmp_path / "song.mp3"
+    source.write_bytes(b"audio")
+    target = tmp_path / "target.mp3"
+    history = History(None)
+
+    assert not history.is_placed(source, source.stat(), target)
+    assert history.owner(target) is None
+
+    history.record(source, source.stat(), target)
+    assert history.is_placed(source, source.stat(), target)
+    assert not history.is_placed(source, source.stat(), tmp_path / "other.mp3")
+    assert history.owner(target) == source
+
+    source.write_bytes(b"modified audio")
+    assert not history.is_placed(source, source.stat(), target)
+
+    history.close()
+
+
+def test_incremental_organize(tmp_path: Path, source: Path, structure: Structure):
+    target = tmp_path / "target"
+    history = History(tmp_path / History.filename)
+
+    organizer = Organizer(structure, move=False, dry_run=False, history=history)
+    organizer.organize(Tree(source), target)
+    assert len(organizer._operations) == 6
+
+    organizer.organize(Tree(source), target)
+    assert len(organizer._operations) == 0
+
+    shutil.copyfile(source / "artist_song1.mp3", source / "copy.mp3")
+    with pytest.raises(CollisionException):
+        organizer.organize(Tree(source), target)
+
+    history.close()
+
+
+def test_incremental_in_place(source: Path, structure: Structure):
+    for expected in (6, 0):
+        history = History(source / History.filename)
+        organizer = Organizer(structure, move=True, dry_run=False, history=history)
+        organizer.organize(Tree(source), source)
+        history.close()
+        Tree.remove_empty(organizer.touched_directories, source, keep_root=True)
+        assert len(organizer._operations) == expected
+    assert len(list((source / "Artist Name").iterdir())) == 6
@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+from tidysic.exceptions import PlanException
+from tidysic.journal import Journal
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.plan import Plan
+from tidysic.settings.structure import Structure
+from tidysic.tidysic import Tidysic
+
+
+def interrupted_run(structure: Structure, source: Path, target: Path) -> Journal:
+    """
+    Starts a journaled move, and only applies the first half of its operations.
+    """
+    organizer = Organizer(structure, move=True, dry_run=False)
+    entries = organizer.plan(Tree(source), target)
+    target.mkdir()
+    journal = Journal(target / Journal.filename, sync_every=2)
+    journal.start(source, target, entries, move=True)
+    organizer.apply_plan(entries[: len(entries) // 2], journal)
+    journal.close(finished=False)
+    return journal
+
+
+def test_journal_records(tmp_path: Path, source: Path, structure: Structure):
+    interrupted_run(structure, source, tmp_path / "target")
+
+    path = tmp_path / "target" / Journal.filename
+    with open(path.with_name(path.name + ".done"), "ab") as file:
+        file.write(b"\x05\x00")
+
+    journal = Journal(path)
+    assert journal.plan is not None
+    pending = list(journal.pending())
+    assert [entry.index for entry in pending] == list(range(3, journal.plan.count))
+    journal.close(finished=True)
+    assert list((tmp_path / "target").glob(".tidysic*")) == []
+
+
+def test_resume(
+    tmp_path: Path, source: Path, structure: Structure, monkeypatch: pytest.MonkeyPatch
+):
+    target = tmp_path / "target"
+    interrupted_run(structure, source, target)
+    (target / ".tidysic").write_text(
+        "artist {{artist}}\nalbum {*{album}}\n{{title}}"
+    )
+
+    def parse(*args: object) -> None:
+        raise AssertionError("the source was parsed again")
+
+    monkeypatch.setattr(Tree, "__init__", parse)
+    # Relative to the current directory, unlike the sources recorded by the journal.
+    monkeypatch.chdir(tmp_path)
+    Tidysic(
+        Path("source"), target, True, False, None, use_cache=False, journal=True
+    ).run()
+
+    artist = target / "Artist Name"
+    assert len(list(artist.glob("*/*"))) == 6
+    assert not source.exists()
+    assert list(target.glob(".tidysic.journal*")) == []
+
+
+def test_resume_other_arguments(tmp_path: Path, source: Path, structure: Structure):
+    target = tmp_path / "target"
+    interrupted_run(structure, source, target)
+
+    with pytest.raises(PlanException):
+        Tidysic(source, target, False, False, None, use_cache=False, journal=True)
+    assert (target / Journal.filename).exists()
+
+
+def test_interrupted_start(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    path = tmp_path / Journal.filename
+
+    def write(path: Path, *args: object, **kwargs: object) -> None:
+        path.write_bytes(b"truncated")
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(Plan, "write", write)
+    with pytest.raises(KeyboardInterrupt):
+        Journal(path).start(tmp_path, tmp_path, [], move=True)
+
+    assert not path.exists()
+    assert Journal(path).plan is None
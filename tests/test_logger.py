@@ -0,0 +1,87 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from tidysic.logger import Logger, LogLevel, Message
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.settings.structure import Structure
+
+log = Logger()
+
+
+def test_lazy_message(capsys: pytest.CaptureFixture[str]):
+    built: list[str] = []
+
+    def message() -> Message:
+        built.append("message")
+        return "Lazy message."
+
+    log.level = LogLevel.WARN
+    assert not log.is_enabled(LogLevel.INFO)
+    log.info(message)
+    assert built == []
+
+    log.level = LogLevel.INFO
+    assert log.is_enabled(LogLevel.INFO)
+    log.info(message)
+    log.level = LogLevel.WARN
+    assert built == ["message"]
+    assert "Lazy message." in capsys.readouterr().out
+
+
+def test_singleton():
+    log.level = LogLevel.INFO
+    try:
+        # Modules imported once the level is set request the instance again.
+        assert Logger().is_enabled(LogLevel.INFO)
+    finally:
+        log.level = LogLevel.WARN
+
+
+def test_events(tmp_path: Path, source: Path, structure: Structure):
+    log.open_events(tmp_path / "events.jsonl")
+    try:
+        organizer = Organizer(structure, move=False, dry_run=True)
+        organizer.organize(Tree(source), tmp_path / "target")
+    finally:
+        log.close_events()
+
+    with open(tmp_path / "events.jsonl") as file:
+        events = [json.loads(line) for line in file]
+    assert len(events) == 6
+    assert {event["op"] for event in events} == {"copied"}
+    assert all(Path(event["source"]).is_relative_to(source) for event in events)
+    assert sum(event["bytes"] for event in events) == organizer.statistics["bytes"]
+    assert all(event["dry_run"] for event in events)
+
+
+def test_light_startup():
+    # The CLI must not load the console, the tag library or the machinery of the
+    # commands before running one.
+    process = subprocess.run(
+        [sys.executable, "-c", "import sys, tidysic.main; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = set(process.stdout.split())
+    assert modules.isdisjoint(
+        {
+            "asyncio",
+            "concurrent.futures",
+            "hashlib",
+            "mutagen",
+            "rich",
+            "sqlite3",
+            "tidysic.checkpoint",
+            "tidysic.collision",
+            "tidysic.comparison",
+            "tidysic.duplicates",
+            "tidysic.file.tag_cache",
+            "tidysic.file.tag_reader",
+            "tidysic.parser",
+        }
+    )
@@ -0,0 +1,165 @@
+import os
+import shutil
+import stat
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from tidysic import parser
+from tidysic.collision import Collision, find_collisions
+from tidysic.copy_backend import CopyBackend
+from tidysic.exceptions import CollisionException
+from tidysic.file.audio_file import AudioFile
+from tidysic.file.tagged_file import TaggedFile
+from tidysic.organizer import Organizer, _Operation
+from tidysic.parser import Tree
+from tidysic.policies import CollisionPolicy
+from tidysic.settings.structure import Structure
+
+
+def test_organize_stream(tmp_path: Path, source: Path, structure: Structure):
+    organizer = Organizer(structure, move=False, dry_run=False)
+    organizer.organize_stream(Tree.unparsed(source).walk(), tmp_path / "target")
+
+    album = tmp_path / "target" / "Artist Name" / "Album Name"
+    assert (album / "album_clutter" / "clutter1").is_file()
+    assert len(list(album.iterdir())) == 3
+
+
+def test_organize_stream_collision(tmp_path: Path, source: Path, structure: Structure):
+    shutil.copyfile(source / "artist_song1.mp3", source / "album" / "copy.mp3")
+
+    organizer = Organizer(structure, move=False, dry_run=True)
+    with pytest.raises(CollisionException):
+        organizer.organize_stream(Tree.unparsed(source).walk(), tmp_path / "target")
+
+
+def test_organize_io_workers(tmp_path: Path, source: Path, structure: Structure):
+    organizer = Organizer(structure, move=True, dry_run=False, io_workers=4)
+    organizer.organize(Tree(source), tmp_path / "target")
+
+    artist = tmp_path / "target" / "Artist Name"
+    assert set(organizer._parents) == {artist / "Unknown album", artist / "Album Name"}
+    assert len(list(artist.glob("*/*"))) == 6
+    assert not any(path.is_file() for path in source.rglob("*"))
+
+
+def test_organize_move_statistics(tmp_path: Path, source: Path, structure: Structure):
+    organizer = Organizer(structure, move=True, dry_run=False, io_workers=2)
+    organizer.organize(Tree(source), tmp_path / "target")
+
+    assert organizer.statistics["renamed"] == 6
+    assert organizer.statistics["transferred"] == 0
+
+
+def make_collisions(source: Path) -> None:
+    for name in ("artist_song1.mp3", "artist_song2.mp3"):
+        shutil.copyfile(source / name, source / "album" / f"copy {name}")
+
+
+def test_organize_collisions_fail(tmp_path: Path, source: Path, structure: Structure):
+    make_collisions(source)
+
+    organizer = Organizer(structure, move=False, dry_run=True)
+    with pytest.raises(CollisionException) as error:
+        organizer.organize(Tree(source), tmp_path / "target")
+    assert len(error.value.collisions) == 2
+
+
+@pytest.mark.parametrize(
+    "policy, count", [(CollisionPolicy.SKIP, 4), (CollisionPolicy.REPORT, 0)]
+)
+def test_organize_collisions_skip(
+    tmp_path: Path,
+    source: Path,
+    structure: Structure,
+    policy: CollisionPolicy,
+    count: int,
+):
+    make_collisions(source)
+
+    organizer = Organizer(structure, move=False, dry_run=False, on_collision=policy)
+    organizer.organize(Tree(source), tmp_path / "target")
+    assert organizer.statistics["copied"] == count
+
+
+def test_organize_collisions_suffix(
+    tmp_path: Path, source: Path, structure: Structure
+):
+    make_collisions(source)
+
+    organizer = Organizer(
+        structure, move=False, dry_run=False, on_collision=CollisionPolicy.SUFFIX
+    )
+    organizer.organize_stream(Tree.unparsed(source).walk(), tmp_path / "target")
+
+    album = tmp_path / "target" / "Artist Name" / "Unknown album"
+    assert {path.name for path in album.glob("*.mp3")} == {
+        "Artist Song 1.mp3",
+        "Artist Song 1 (2).mp3",
+        "Artist Song 2.mp3",
+        "Artist Song 2 (2).mp3",
+    }
+
+
+def test_suggested_tag():
+    first = AudioFile(Path("first.mp3"), {"title": "Title", "album": "First"})
+    second = AudioFile(Path("second.mp3"), {"title": "Title", "album": "Second"})
+    assert Collision(Path("Title.mp3"), [first, second]).suggested_tag == "album"
+
+    second.album = "First"
+    assert Collision(Path("Title.mp3"), [first, second]).suggested_tag is None
+
+
+def test_move_across_filesystems(tmp_path: Path):
+    source = tmp_path / "source"
+    (source / "clutter").mkdir(parents=True)
+    for path in (source / "private.mp3", source / "clutter" / "private.jpg"):
+        path.write_bytes(b"private")
+        path.chmod(0o600)
+
+    target = tmp_path / "target"
+    target.mkdir()
+    for name in ("private.mp3", "clutter"):
+        operation = _Operation(TaggedFile(source / name), target / name, False)
+        operation.move(CopyBackend(), rename=False)
+
+    for path in (target / "private.mp3", target / "clutter" / "private.jpg"):
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert list(source.iterdir()) == []
+
+
+def test_find_collisions():
+    targets = [Path("a"), Path("b"), Path("a"), Path("c"), Path("b"), Path("a")]
+    assert find_collisions(targets) == {Path("a"): [0, 2, 5], Path("b"): [1, 4]}
+    assert find_collisions(targets[:2]) == {}
+
+
+def test_organize_stream_in_place(
+    tmp_path: Path, structure: Structure, monkeypatch: pytest.MonkeyPatch
+):
+    source = tmp_path / "source"
+    album = source / "Artist Name" / "Album Name"
+    album.mkdir(parents=True)
+    music = Path("tests/music/clutter test") / "album"
+    shutil.copyfile(music / "album_song1.mp3", album / "Album Song 1.mp3")
+    (source / "0 incoming").mkdir()
+    shutil.copyfile(music / "album_song2.mp3", source / "0 incoming" / "song.mp3")
+
+    scandir = os.scandir
+
+    @contextmanager
+    def sorted_scandir(path: Path) -> Iterator[list[os.DirEntry[str]]]:
+        with scandir(path) as entries:
+            yield sorted(entries, key=lambda entry: entry.name)
+
+    # The incoming file is moved into the album before the album is listed.
+    monkeypatch.setattr(parser.os, "scandir", sorted_scandir)
+    organizer = Organizer(structure, move=True, dry_run=False)
+    organizer.organize_stream(Tree.unparsed(source).walk(), source)
+
+    assert sorted(path.name for path in album.iterdir()) == [
+        "Album Song 1.mp3",
+        "Album Song 2.mp3",
+    ]
@@ -0,0 +1,64 @@
+import asyncio
+import shutil
+from pathlib import Path
+from typing import AsyncIterator
+
+import pytest
+from tidysic.exceptions import CollisionException
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.pipeline import run_pipeline, walk_async
+from tidysic.settings.structure import Structure
+
+
+def test_walk_async(source: Path):
+    async def walk() -> list[Path]:
+        return [node.root async for node in walk_async(Tree.unparsed(source), 2)]
+
+    expected = [node.root for node in Tree.unparsed(source).walk()]
+    assert asyncio.run(walk()) == expected
+
+
+def test_run_pipeline(tmp_path: Path, source: Path, structure: Structure):
+    organizer = Organizer(structure, move=False, dry_run=False, io_workers=3)
+    asyncio.run(
+        run_pipeline(Tree.unparsed(source), organizer, tmp_path / "target", jobs=2)
+    )
+
+    album = tmp_path / "target" / "Artist Name" / "Album Name"
+    assert (album / "album_clutter" / "clutter1").is_file()
+    assert organizer.statistics["copied"] == 6
+
+
+def test_run_pipeline_collision(tmp_path: Path, source: Path, structure: Structure):
+    shutil.copyfile(source / "artist_song1.mp3", source / "album" / "copy.mp3")
+
+    organizer = Organizer(structure, move=False, dry_run=True)
+    with pytest.raises(CollisionException):
+        asyncio.run(run_pipeline(Tree.unparsed(source), organizer, tmp_path / "target"))
+
+
+def test_organize_async_error(
+    tmp_path: Path, structure: Structure, monkeypatch: pytest.MonkeyPatch
+):
+    source = tmp_path / "source"
+    shutil.copytree("tests/music/clutter test", source / "first")
+    shutil.copytree("tests/music/format title-artist-album", source / "second")
+    taken: list[Tree] = []
+
+    async def take() -> AsyncIterator[Tree]:
+        async for node in walk_async(Tree.unparsed(source)):
+            taken.append(node)
+            yield node
+            # Lets the workers fail on the operations of the node.
+            await asyncio.sleep(0.05)
+
+    def fail(*args: object, **kwargs: object) -> None:
+        raise OSError("No space left on device")
+
+    organizer = Organizer(structure, move=False, dry_run=False)
+    monkeypatch.setattr(organizer, "_execute", fail)
+    with pytest.raises(OSError):
+        asyncio.run(organizer.organize_async(take(), tmp_path / "target"))
+    # The node taken while the operations failed is the last one.
+    assert len(taken) == 2
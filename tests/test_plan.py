@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+
+import pytest
+from tidysic.exceptions import PlanException
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+from tidysic.plan import Plan, PlanEntry
+from tidysic.settings.structure import Structure
+from tidysic.tidysic import PlanApplier, Tidysic
+
+
+def write_plan(source: Path, structure: Structure, move: bool) -> Path:
+    """
+    Writes the plan of the given source next to it, into a sibling target directory.
+    """
+    path = source.parent / "plan.bin"
+    target = source.parent / "target"
+    organizer = Organizer(structure, move=move, dry_run=False)
+    entries = organizer.plan(Tree(source), target)
+    Plan.write(path, source, target, entries, len(entries), move)
+    return path
+
+
+def test_roundtrip(tmp_path: Path):
+    entries = [
+        PlanEntry(tmp_path / "a" / "b.mp3", tmp_path / "t" / "c.mp3", 12, 34),
+        PlanEntry(tmp_path / "a" / "é.jpg", tmp_path / "t" / "é.jpg", 0, -1),
+    ]
+    Plan.write(tmp_path / "plan.bin", tmp_path / "a", tmp_path / "t", entries, 2, True)
+
+    plan = Plan(tmp_path / "plan.bin")
+    assert plan.move
+    assert plan.count == 2
+    assert list(plan.entries()) == entries
+    assert list(plan.entries(1)) == entries[1:]
+
+
+def test_not_a_plan(tmp_path: Path):
+    (tmp_path / "plan.bin").write_bytes(b"TIDYPLAN\x01")
+    with pytest.raises(PlanException):
+        Plan(tmp_path / "plan.bin")
+
+
+def test_shards(source: Path, structure: Structure):
+    plan = Plan(write_plan(source, structure, move=False))
+
+    ranges = [plan.shard(index, 3) for index in range(3)]
+    assert [index for shard in ranges for index in shard] == list(range(plan.count))
+    assert [
+        entry for shard in ranges for entry in plan.entries(shard.start, shard.stop)
+    ] == list(plan.entries())
+
+
+def test_apply_shards(tmp_path: Path, source: Path, structure: Structure):
+    plan = Plan(write_plan(source, structure, move=True))
+
+    for index in range(2):
+        shard = plan.shard(index, 2)
+        organizer = Organizer(structure, move=True, dry_run=False)
+        organizer.apply_plan(plan.entries(shard.start, shard.stop))
+        Tree.remove_empty(organizer.touched_directories, plan.source)
+
+    artist = tmp_path / "target" / "Artist Name"
+    assert len(list(artist.glob("*/*"))) == 6
+    assert not source.exists()
+
+
+def test_apply_modified_source(tmp_path: Path, source: Path, structure: Structure):
+    plan = Plan(write_plan(source, structure, move=False))
+    entry = next(plan.entries())
+    os.utime(entry.source, ns=(0, 0))
+
+    organizer = Organizer(structure, move=False, dry_run=False)
+    organizer.apply_plan(plan.entries())
+
+    assert organizer.statistics["copied"] == plan.count - 1
+    assert not entry.target.exists()
+
+
+def test_apply_incremental(tmp_path: Path, source: Path):
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / ".tidysic").write_text("artist {{artist}}\nalbum {*{album}}\n{{title}}")
+
+    def plan() -> Plan:
+        Tidysic(
+            source, target, False, False, None, use_cache=False, incremental=True
+        ).plan(tmp_path / "plan.bin")
+        return Plan(tmp_path / "plan.bin")
+
+    assert plan().count == 6
+    PlanApplier(tmp_path / "plan.bin", False).run()
+    # The applied operations are recorded into the history of the target.
+    assert plan().count == 0
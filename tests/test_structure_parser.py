@@ -1,4 +1,7 @@
+from pathlib import Path
+
 import pytest
+from tidysic.file.taggable import Taggable
 from tidysic.settings.structure import Structure
 
 settings_ok = """\
@@ -18,3 +21,16 @@ def test_parser():
 
     with pytest.raises(ValueError):
         Structure.parse(settings_tag_in_step)
+
+
+def test_folder_path():
+    structure = Structure.get_default()
+    first = Taggable(artist="Artist", album="Album", date="1999", title="First")
+    second = Taggable(artist="Artist", album="Album", date="1999", title="Second")
+
+    path = structure.folder_path(first)
+    assert path == Path("Artist", "(1999) Album")
+    assert structure.folder_path(second) is path
+
+    first.date = "2000"
+    assert structure.folder_path(first) == Path("Artist", "(2000) Album")
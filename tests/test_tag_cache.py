@@ -0,0 +1,57 @@
+import os
+import shutil
+from pathlib import Path
+
+from tidysic.file.tag_cache import TagCache
+from tidysic.file.taggable import Taggable
+from tidysic.parser import Tree
+
+
+def test_tag_cache(tmp_path: Path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"audio")
+    cache = TagCache(tmp_path / TagCache.filename)
+
+    assert cache.get(path, path.stat()) is None
+
+    cache.put(path, path.stat(), Taggable(artist="Artist", tracknumber="3"))
+    assert cache.get(path, path.stat()) == {"artist": "Artist", "tracknumber": "3"}
+
+    path.write_bytes(b"modified audio")
+    assert cache.get(path, path.stat()) is None
+
+    cache.close()
+
+
+def test_tag_cache_prune(tmp_path: Path):
+    kept = tmp_path / "kept.mp3"
+    removed = tmp_path / "removed.mp3"
+    for path in (kept, removed):
+        path.write_bytes(b"audio")
+
+    cache = TagCache(tmp_path / TagCache.filename)
+    cache.put(kept, kept.stat(), Taggable(title="Kept"))
+    cache.put(removed, removed.stat(), Taggable(title="Removed"))
+    cache.close()
+
+    os.remove(removed)
+    cache = TagCache(tmp_path / TagCache.filename)
+    assert cache.get(kept, kept.stat()) == {"title": "Kept"}
+    assert cache.prune(tmp_path) == 1
+    assert cache.prune(tmp_path) == 0
+    cache.close()
+
+
+def test_tree_cache(tmp_path: Path):
+    source = tmp_path / "music"
+    shutil.copytree("tests/music/clutter test", source)
+    cache = TagCache(tmp_path / TagCache.filename)
+
+    cold = Tree(source, cache=cache)
+    assert (cache.hits, cache.misses) == (0, 4)
+
+    warm = Tree(source, cache=cache)
+    assert (cache.hits, cache.misses) == (4, 4)
+
+    assert cold.common_tags == warm.common_tags
+    cache.close()
@@ -0,0 +1,152 @@
+import shutil
+import struct
+from pathlib import Path
+
+import pytest
+from mutagen.easyid3 import EasyID3
+from tidysic.file.tag_reader import payload_range, read_tags
+
+tags = {
+    "album": "Album Name",
+    "artist": "Artist Name",
+    "title": "Tïtle",
+    "genre": "Rock",
+    "tracknumber": "3",
+    "date": "1999",
+}
+
+
+def vorbis_comment(padding: int = 0) -> bytes:
+    comments = [f"{name.upper()}={value}".encode() for name, value in tags.items()]
+    comments.append(b"COMMENT=" + b"x" * padding)
+    data = struct.pack("<I", 6) + b"vendor" + struct.pack("<I", len(comments))
+    return data + b"".join(struct.pack("<I", len(c)) + c for c in comments)
+
+
+def ogg_pages(*packets: bytes) -> bytes:
+    lacing = b"".join(
+        b"\xff" * (len(packet) // 255) + bytes([len(packet) % 255])
+        for packet in packets
+    )
+    body = b"".join(packets)
+    pages = b""
+    while lacing:
+        segments, lacing = lacing[:255], lacing[255:]
+        size = sum(segments)
+        pages += b"OggS" + b"\0" * 22 + bytes([len(segments)]) + segments
+        pages += body[:size]
+        body = body[size:]
+    return pages
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_read_id3v2(tmp_path: Path, version: int):
+    path = tmp_path / "song.mp3"
+    shutil.copyfile("tests/music/normal/normal.mp3", path)
+    id3 = EasyID3(path)
+    id3.update({**tags, "genre": "17"})
+    id3.save(v2_version=version)
+
+    expected = {name: value[0] for name, value in EasyID3(path).items()}
+    assert read_tags(path) == expected == tags
+
+
+def test_read_id3v1(tmp_path: Path):
+    path = tmp_path / "song.mp3"
+    v1 = b"TAG" + b"Title".ljust(30, b"\0") + b"Artist".ljust(30, b"\0")
+    v1 += b"Album".ljust(30, b"\0") + b"1999" + b"\0" * 29 + b"\x03\x11"
+    path.write_bytes(b"\xff\xfb" + b"\0" * 1000 + v1)
+
+    assert read_tags(path) == {
+        "album": "Album",
+        "artist": "Artist",
+        "title": "Title",
+        "genre": "Rock",
+        "tracknumber": "3",
+        "date": "1999",
+    }
+
+
+def test_read_flac(tmp_path: Path):
+    path = tmp_path / "song.flac"
+    comment = vorbis_comment()
+    streaminfo = b"\x00" + (34).to_bytes(3, "big") + b"\0" * 34
+    picture = b"\x06" + (1000).to_bytes(3, "big") + b"\0" * 1000
+    vorbis = b"\x84" + len(comment).to_bytes(3, "big") + comment
+    path.write_bytes(b"fLaC" + streaminfo + picture + vorbis + b"\0" * 1000)
+
+    assert read_tags(path) == tags
+
+
+def test_read_ogg(tmp_path: Path):
+    path = tmp_path / "song.ogg"
+    # The comment packet spans several pages.
+    comment = b"\x03vorbis" + vorbis_comment(padding=100000) + b"\x01"
+    path.write_bytes(ogg_pages(b"\x01vorbis" + b"\0" * 23, comment))
+
+    assert read_tags(path) == tags
+
+
+def test_read_wav(tmp_path: Path):
+    path = tmp_path / "song.wav"
+    info = b"INFO"
+    for identifier, value in ((b"INAM", b"Info Title\0"), (b"IART", b"Artist Name\0")):
+        info += identifier + struct.pack("<I", len(value)) + value
+        info += b"\0" * (len(value) % 2)
+    id3 = b"ID3\x03\x00\x00" + bytes([0, 0, 0, 20])
+    id3 += b"TIT2" + struct.pack(">I", 6) + b"\0\0" + b"\0Title" + b"\0" * 4
+    chunks = b"fmt " + struct.pack("<I", 16) + b"\0" * 16
+    chunks += b"data" + struct.pack("<I", 1001) + b"\0" * 1002
+    chunks += b"LIST" + struct.pack("<I", len(info)) + info
+    chunks += b"id3 " + struct.pack("<I", len(id3)) + id3
+    path.write_bytes(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+
+    assert read_tags(path) == {"artist": "Artist Name", "title": "Title"}
+
+
+def test_read_unknown(tmp_path: Path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"not audio")
+
+    assert read_tags(path) is None
+
+
+def test_payload_id3(tmp_path: Path):
+    path = tmp_path / "song.mp3"
+    v1 = b"TAG" + b"\0" * 125
+    ape = b"APETAGEX" + struct.pack("<IIII", 2000, 40, 0, 0x80000000) + b"\0" * 8
+    path.write_bytes(b"\xff\xfb" + b"\1" * 1000 + b"\0" * 40 + ape + v1)
+    assert payload_range(path) == (0, 1002)
+
+    id3 = EasyID3()
+    id3.update(tags)
+    id3.save(path, v1=0)
+    start, end = payload_range(path)
+    assert path.read_bytes()[start:end] == b"\xff\xfb" + b"\1" * 1000
+
+
+def test_payload_flac_wav_ogg(tmp_path: Path):
+    flac = tmp_path / "song.flac"
+    comment = vorbis_comment()
+    vorbis = b"\x84" + len(comment).to_bytes(3, "big") + comment
+    flac.write_bytes(b"fLaC" + vorbis + b"\1" * 1000)
+    assert payload_range(flac) == (8 + len(comment), 8 + len(comment) + 1000)
+
+    wav = tmp_path / "song.wav"
+    chunks = b"fmt " + struct.pack("<I", 16) + b"\0" * 16
+    chunks += b"data" + struct.pack("<I", 1001) + b"\1" * 1002
+    wav.write_bytes(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+    assert payload_range(wav) == (44, 1045)
+
+    ogg = tmp_path / "song.ogg"
+    headers = ogg_pages(b"\x01vorbis" + b"\0" * 23, b"\x03vorbis" + comment)
+    audio = b"OggS\0\0" + struct.pack("<q", 1024) + b"\0" * 12 + b"\x01\x10"
+    ogg.write_bytes(headers + audio + b"\1" * 16)
+    assert payload_range(ogg) == (len(headers), len(headers) + 44)
+
+
+def test_payload_unknown(tmp_path: Path):
+    path = tmp_path / "song.mp3"
+    path.write_bytes(b"not audio")
+
+    assert payload_range(path) == (0, 9)
@@ -1,5 +1,36 @@
+from pathlib import Path
+
 from tidysic import __version__
+from tidysic.file.tag_cache import TagCache
+from tidysic.policies import Comparison
+from tidysic.tidysic import Tidysic
 
 
 def test_version():
     assert __version__ == '0.1.0'
+
+
+def test_dry_run_databases(tmp_path: Path, source: Path):
+    target = tmp_path / "target"
+    target.mkdir()
+    (target / ".tidysic").write_text("artist {{artist}}\nalbum {*{album}}\n{{title}}")
+
+    def run(dry_run: bool) -> None:
+        Tidysic(
+            source,
+            target,
+            False,
+            dry_run,
+            None,
+            incremental=True,
+            skip_unchanged=Comparison.FULL,
+        ).run()
+
+    run(dry_run=True)
+    assert [path.name for path in target.iterdir()] == [".tidysic"]
+
+    run(dry_run=False)
+    cache = target / TagCache.filename
+    stamp = cache.stat().st_mtime_ns, cache.read_bytes()
+    run(dry_run=True)
+    assert (cache.stat().st_mtime_ns, cache.read_bytes()) == stamp
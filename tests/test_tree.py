@@ -1,3 +1,6 @@
+import shutil
+import sys
+from dataclasses import astuple
 from pathlib import Path
 
 from tidysic.file.audio_file import AudioFile
@@ -43,3 +46,92 @@ def test_clutter():
     assert album_clutter.artist == "Artist Name"
     assert album_clutter.album == "Album Name"
     assert album_clutter.title is None
+
+
+def test_tree_jobs():
+    def shape(root: Tree) -> tuple:
+        return (
+            root._root,
+            root.common_tags and astuple(root.common_tags),
+            frozenset((f.path, f.title) for f in root.audio_files),
+            frozenset((f.path, f.artist, f.album) for f in root.clutter_files),
+            frozenset(shape(child) for child in root.children),
+        )
+
+    sequential = Tree(Path("tests/music"))
+    concurrent = Tree(Path("tests/music"), jobs=4)
+
+    assert shape(sequential) == shape(concurrent)
+
+
+def test_walk():
+    root = Path("tests/music/clutter test")
+    tree = Tree.unparsed(root)
+
+    nodes = []
+    for node in tree.walk():
+        assert node.common_tags is not None
+        nodes.append((node._root, len(node.audio_files)))
+
+    assert nodes == [(root / "album", 2), (root, 2)]
+    assert len(tree.children) == 1
+    assert len(tree.audio_files) == 0
+
+
+def test_walk_lookahead(tmp_path: Path):
+    for index in range(20):
+        album = tmp_path / f"album {index:02}"
+        album.mkdir()
+        for track in range(3):
+            shutil.copyfile("tests/music/normal/normal.mp3", album / f"{track}.mp3")
+
+    tree = Tree.unparsed(tmp_path)
+    first = next(tree.walk(jobs=2))
+    listed = [
+        subtree
+        for subtree in tree._subtrees
+        if subtree is not first and (subtree._pending or subtree.audio_files)
+    ]
+    # Only the next few siblings are listed ahead of the walk.
+    assert 0 < len(listed) <= 4
+
+
+def test_dangling_symlink(tmp_path: Path):
+    shutil.copyfile("tests/music/normal/normal.mp3", tmp_path / "normal.mp3")
+    (tmp_path / "link").symlink_to(tmp_path / "missing")
+
+    tree = Tree(tmp_path)
+    assert [file.path.name for file in tree.clutter_files] == ["link"]
+    assert tree.common_tags is not None
+
+
+def test_deep_tree(tmp_path: Path):
+    depth = sys.getrecursionlimit() + 100
+    leaf = tmp_path
+    for _ in range(depth):
+        leaf /= "d"
+        leaf.mkdir()
+    shutil.copyfile("tests/music/normal/normal.mp3", leaf / "normal.mp3")
+
+    tree = Tree(tmp_path)
+    assert len(list(tree.nodes())) == depth + 1
+    assert tree.common_tags is not None
+
+    (leaf / "normal.mp3").unlink()
+    tree.clean_up()
+    assert not tmp_path.exists()
+
+
+def test_remove_empty(tmp_path: Path):
+    for directory in ("a/b/c", "a/d", "e"):
+        (tmp_path / directory).mkdir(parents=True)
+    (tmp_path / "a" / "d" / "file").touch()
+
+    statistics = Tree.remove_empty(
+        [tmp_path / "a" / "b" / "c", tmp_path / "a" / "d", tmp_path / "missing"],
+        tmp_path,
+        keep_root=True,
+    )
+    # The untouched empty directory is left alone, and the missing one skipped.
+    assert sorted(path.name for path in tmp_path.rglob("*")) == ["a", "d", "e", "file"]
+    assert statistics == {"removed": 2, "checked": 5}
@@ -0,0 +1,110 @@
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pytest
+from tidysic import tidysic
+from tidysic.tidysic import Watcher
+from tidysic.watch import watch_directories
+
+
+def wait_for(condition: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.mark.parametrize("poll_interval", [None, 0.05])
+def test_watch_directories(tmp_path: Path, poll_interval: Optional[float]):
+    album = tmp_path / "artist" / "album"
+    album.mkdir(parents=True)
+    stop = threading.Event()
+    batches: list[set[Path]] = []
+
+    def watch() -> None:
+        batches.extend(watch_directories(tmp_path, 0.2, stop, poll_interval))
+
+    thread = threading.Thread(target=watch)
+    thread.start()
+    try:
+        # Let the watching start before adding files.
+        time.sleep(0.1)
+        for index in range(3):
+            (album / f"track {index}.mp3").write_bytes(b"\0")
+            time.sleep(0.05)
+        (tmp_path / "new album").mkdir()
+        (tmp_path / "new album" / "track.mp3").write_bytes(b"\0")
+        wait_for(lambda: sum(len(batch) for batch in batches[1:]) >= 2)
+    finally:
+        stop.set()
+        thread.join()
+
+    # The root comes first, then each directory once, after its last change.
+    assert batches[0] == {tmp_path}
+    assert set().union(*batches[1:]) == {album, tmp_path / "new album"}
+    assert sum(len(batch) for batch in batches[1:]) == 2
+
+
+def test_watcher(tmp_path: Path):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    source.mkdir()
+    shutil.copytree("tests/music/clutter test", source / "first")
+    target.mkdir()
+    (target / ".tidysic").write_text("artist {{artist}}\nalbum {*{album}}\n{{title}}")
+
+    watcher = Watcher(source, target, True, False, None, debounce=0.1)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        artist = target / "Artist Name"
+        wait_for(lambda: len(list(artist.glob("*/*"))) == 6)
+        wait_for(lambda: list(source.iterdir()) == [])
+
+        shutil.copytree("tests/music/normal", source / "second")
+        wait_for(lambda: not (source / "second").exists())
+    finally:
+        watcher.stop()
+        thread.join()
+
+    # The root of the source is kept to watch it.
+    assert source.exists()
+    assert len(list(target.glob("*/*/*.mp3"))) == 5
+
+
+def test_watcher_removed_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    source = tmp_path / "source"
+    target = tmp_path / "target"
+    source.mkdir()
+    target.mkdir()
+    (target / ".tidysic").write_text("artist {{artist}}\nalbum {*{album}}\n{{title}}")
+
+    removed: list[Path] = []
+
+    class Tree(tidysic.Tree):
+        def __init__(self, directory: Path, *args: Any) -> None:
+            super().__init__(directory, *args)
+            files = sorted(directory.rglob("*.mp3"))
+            if files and not removed:
+                # Removed between the event and the organizing of its batch.
+                files[0].unlink()
+                removed.append(files[0])
+
+    monkeypatch.setattr(tidysic, "Tree", Tree)
+    watcher = Watcher(source, target, True, False, None, debounce=0.1)
+    thread = threading.Thread(target=watcher.run)
+    thread.start()
+    try:
+        time.sleep(0.2)
+        shutil.copytree("tests/music/clutter test", source / "first")
+        wait_for(lambda: bool(removed))
+        # The failed batch does not stop the watching.
+        shutil.copytree("tests/music/normal", source / "second")
+        wait_for(lambda: not (source / "second").exists())
+        assert thread.is_alive()
+    finally:
+        watcher.stop()
+        thread.join()
@@ -0,0 +1,98 @@
+import json
+import os
+from pathlib import Path
+from typing import Optional, TextIO
+
+from tidysic.file.taggable import Taggable
+from tidysic.logger import Logger, Text
+
+log = Logger()
+
+
+class Checkpoint:
+    """
+    Record of the directories whose files were all organized, along with the tags
+    common to them, allowing an interrupted run to resume without walking them again.
+
+    The record is a file to which a JSON line is appended for each directory, so that
+    it stays readable whenever the run is interrupted.
+    """
+
+    filename = ".tidysic.checkpoint"
+
+    def __init__(self, path: Optional[Path], read_only: bool = False) -> None:
+        """
+        Opens the checkpoint stored in the given file, resuming from it if it exists.
+
+        Args:
+            path (Optional[Path]): File containing the checkpoint. If None, the
+                checkpoint only lives in memory.
+            read_only (bool): If true, the checkpoint is resumed from the file, but
+                the newly completed directories only live in memory.
+        """
+        self._path = path
+        self._read_only = read_only
+        self._completed: dict[str, Optional[Taggable]] = {}
+        self._file: Optional[TextIO] = None
+
+        if path is None:
+            return
+        if path.exists():
+            self._load(path)
+            log.info(
+                Text.assemble(
+                    "Resuming from checkpoint ",
+                    (str(path), "path"),
+                    f", skipping {len(self._completed)} completed folder(s).",
+                )
+            )
+        if not read_only:
+            self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self, path: Path) -> None:
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line, cut short by the interruption.
+                    break
+                tags = entry["tags"]
+                self._completed[entry["path"]] = (
+                    None if tags is None else Taggable(**tags)
+                )
+
+    def get(self, directory: Path) -> tuple[bool, Optional[Taggable]]:
+        """
+        Returns whether the given directory is completed, and if so the tags common to
+        its files.
+        """
+        key = os.path.abspath(directory)
+        return key in self._completed, self._completed.get(key)
+
+    def complete(self, directory: Path, common_tags: Optional[Taggable]) -> None:
+        """
+        Records that all files of the given directory and its subdirectories were
+        organized.
+        """
+        key = os.path.abspath(directory)
+        self._completed[key] = common_tags
+        if self._file is not None:
+            tags = None
+            if common_tags is not None:
+                tags = {
+                    name: getattr(common_tags, name)
+                    for name in Taggable.get_tag_names()
+                }
+            self._file.write(json.dumps({"path": key, "tags": tags}) + "\n")
+            self._file.flush()
+
+    def close(self, finished: bool) -> None:
+        """
+        Closes the checkpoint, deleting it if the run it records is finished.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if finished and self._path is not None and not self._read_only:
+            self._path.unlink(missing_ok=True)
@@ -0,0 +1,54 @@
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+from tidysic.file.taggable import Taggable
+from tidysic.file.tagged_file import TaggedFile
+
+
+@dataclass
+class Collision:
+    """
+    Group of files that are to be moved or copied to the same target.
+    """
+
+    target: Path
+    sources: list[TaggedFile]
+
+    @property
+    def suggested_tag(self) -> Optional[str]:
+        """
+        Name of the first tag whose values tell all the sources apart, if any. Adding
+        it to the structure would thus resolve the collision.
+        """
+        for name in Taggable.get_tag_names():
+            values = [getattr(source, name) for source in self.sources]
+            if None not in values and len(set(values)) == len(values):
+                return name
+        return None
+
+
+def suffixed(target: Path, number: int) -> Path:
+    """
+    Returns the given target with the given number appended to its name, before its
+    extension.
+    """
+    return target.with_name(f"{target.stem} ({number}){target.suffix}")
+
+
+def find_collisions(targets: Sequence[Path]) -> dict[Path, list[int]]:
+    """
+    Returns the indices of the given targets that occur more than once, grouped by
+    target.
+
+    Targets are counted in bulk first, so that only the colliding ones are grouped.
+    """
+    colliding = {target for target, count in Counter(targets).items() if count > 1}
+    if not colliding:
+        return {}
+    groups: dict[Path, list[int]] = {target: [] for target in colliding}
+    for index, target in enumerate(targets):
+        if target in colliding:
+            groups[target].append(index)
+    return groups
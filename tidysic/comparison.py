@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from collections import Counter
+from stat import S_ISREG
+from typing import Callable, Optional
+
+from tidysic.file.hash_cache import HashCache
+from tidysic.policies import Comparison
+
+# Files up to this size are hashed whole even when sampling.
+_SAMPLE_THRESHOLD = 1024 * 1024
+
+# Size and number of the chunks hashed when sampling, spread evenly over the file.
+# The first and last ones cover the tags, stored at either end of audio files.
+_SAMPLE_SIZE = 64 * 1024
+_SAMPLES = 6
+
+_BUFFER_SIZE = 1024 * 1024
+
+_CopyFunction = Callable[[str, str], object]
+
+
+def _hash_sampled(file_descriptor: int, size: int) -> bytes:
+    if size <= _SAMPLE_THRESHOLD:
+        return _hash_full(file_descriptor)
+    digest = hashlib.blake2b(size.to_bytes(8, "little"))
+    step = (size - _SAMPLE_SIZE) // (_SAMPLES - 1)
+    for index in range(_SAMPLES):
+        digest.update(os.pread(file_descriptor, _SAMPLE_SIZE, index * step))
+    return digest.digest()
+
+
+def _hash_full(file_descriptor: int) -> bytes:
+    digest = hashlib.blake2b()
+    while chunk := os.read(file_descriptor, _BUFFER_SIZE):
+        digest.update(chunk)
+    return digest.digest()
+
+
+class Comparator:
+    """
+    Tells which targets are already identical to their sources, so that copying them
+    again can be skipped.
+
+    Files of different sizes always differ. Otherwise, the metadata comparison only
+    checks the modification times, which copies preserve. The hash comparisons ignore
+    the modification times, so that a file touched without being modified is not
+    copied again: its target only gets the modification time of the source, for the
+    next comparisons to be fast.
+    """
+
+    def __init__(
+        self,
+        comparison: Comparison,
+        cache: Optional[HashCache] = None,
+        dry_run: bool = False,
+    ) -> None:
+        """
+        Args:
+            comparison (Comparison): How to compare sources and targets.
+            cache (Optional[HashCache]): Cache from which the hashes of unchanged
+                files are read, and into which newly computed hashes are stored.
+            dry_run (bool): If true, neither the targets nor the cache are modified.
+        """
+        self._comparison = comparison
+        self._cache = cache
+        self._dry_run = dry_run
+        self._lock = threading.Lock()
+        # Number of files and bytes that were skipped.
+        self.skipped: Counter[str] = Counter()
+
+    def unchanged(
+        self, source: str | os.PathLike[str], target: str | os.PathLike[str]
+    ) -> bool:
+        """
+        Returns whether the given target is a regular file identical to the given
+        source, counting it as skipped if so.
+        """
+        try:
+            target_stat = os.stat(target)
+        except FileNotFoundError:
+            return False
+        source_stat = os.stat(source)
+        if not S_ISREG(target_stat.st_mode) or (
+            source_stat.st_size != target_stat.st_size
+        ):
+            return False
+
+        if self._comparison is Comparison.METADATA:
+            if source_stat.st_mtime_ns != target_stat.st_mtime_ns:
+                return False
+        else:
+            digest = self._hash(source, source_stat)
+            if digest != self._hash(target, target_stat):
+                return False
+            if not self._dry_run and source_stat.st_mtime_ns != target_stat.st_mtime_ns:
+                os.utime(target, ns=(target_stat.st_atime_ns, source_stat.st_mtime_ns))
+                if self._cache is not None:
+                    self._cache.put(os.stat(target), self._comparison.value, digest)
+
+        with self._lock:
+            self.skipped["files"] += 1
+            self.skipped["bytes"] += source_stat.st_size
+        return True
+
+    def _hash(self, path: str | os.PathLike[str], stat: os.stat_result) -> bytes:
+        method = self._comparison.value
+        if self._cache is not None:
+            digest = self._cache.get(stat, method)
+            if digest is not None:
+                return digest
+
+        file_descriptor = os.open(path, os.O_RDONLY)
+        try:
+            if self._comparison is Comparison.SAMPLED:
+                digest = _hash_sampled(file_descriptor, stat.st_size)
+            else:
+                digest = _hash_full(file_descriptor)
+        finally:
+            os.close(file_descriptor)
+
+        if self._cache is not None and not self._dry_run:
+            self._cache.put(stat, method, digest)
+        return digest
+
+    def copy_function(self, copy: _CopyFunction) -> _CopyFunction:
+        """
+        Wraps the given copy function, for instance to give to `shutil.copytree`, so
+        that it skips the unchanged targets.
+        """
+
+        def copy_changed(source: str, target: str) -> object:
+            if self.unchanged(source, target):
+                return target
+            return copy(source, target)
+
+        return copy_changed
@@ -0,0 +1,199 @@
+import contextlib
+import errno
+import os
+import shutil
+import sys
+import threading
+from collections import Counter
+from enum import Enum
+from typing import BinaryIO, Callable
+
+from tidysic.logger import Logger, Text
+
+log = Logger()
+
+# Errors meaning that a strategy is not supported for the given pair of files, in which
+# case the next strategy is attempted.
+_UNSUPPORTED = {
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.ENOTSUP,
+    errno.EPERM,
+    errno.EMLINK,
+}
+
+# _IOW(0x94, 9, int), from linux/fs.h.
+_FICLONE = 0x40049409
+
+_BUFFER_SIZE = 1024 * 1024
+
+
+class CopyStrategy(Enum):
+    """
+    Ways of copying a file, from the fastest to the most widely supported.
+    """
+
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    COPY_FILE_RANGE = "copy_file_range"
+    SENDFILE = "sendfile"
+    BUFFERED = "buffered"
+
+
+def _reflink(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    import fcntl
+
+    fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+
+
+def _copy_file_range(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source.fileno(), target.fileno(), size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+def _sendfile(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    copied = 0
+    while copied < size:
+        count = os.sendfile(target.fileno(), source.fileno(), copied, size - copied)
+        if count == 0:
+            break
+        copied += count
+
+
+def _buffered(source: BinaryIO, target: BinaryIO, size: int) -> None:
+    shutil.copyfileobj(source, target, _BUFFER_SIZE)
+
+
+class CopyBackend:
+    """
+    Copies files using the fastest strategy supported by the filesystems involved.
+
+    Strategies are attempted in the order of `CopyStrategy`, falling back to the next
+    one whenever the system reports that a strategy is not supported, down to a plain
+    buffered copy. Hard links are only attempted if explicitly enabled, since the copy
+    then shares its content with the original.
+    """
+
+    def __init__(self, link: bool = False) -> None:
+        self._link = link
+        self._strategies: list[
+            tuple[CopyStrategy, Callable[[BinaryIO, BinaryIO, int], None]]
+        ] = []
+        if sys.platform.startswith("linux"):
+            self._strategies.append((CopyStrategy.REFLINK, _reflink))
+        if hasattr(os, "copy_file_range"):
+            self._strategies.append((CopyStrategy.COPY_FILE_RANGE, _copy_file_range))
+        if hasattr(os, "sendfile"):
+            self._strategies.append((CopyStrategy.SENDFILE, _sendfile))
+
+        self.counts: Counter[CopyStrategy] = Counter()
+        self._lock = threading.Lock()
+
+    def copy(
+        self, source: str | os.PathLike[str], target: str | os.PathLike[str]
+    ) -> str:
+        """
+        Copies the content and modification time of the file `source` to `target`,
+        replacing it if it exists. Can be given to `shutil.copytree` as
+        `copy_function`.
+
+        Returns:
+            str: The target.
+        """
+        strategy = self._copy(source, target)
+        if strategy is not CopyStrategy.HARDLINK:
+            # Preserved so that unchanged copies can be told by their metadata.
+            stat = os.stat(source)
+            os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        with self._lock:
+            self.counts[strategy] += 1
+        return os.fspath(target)
+
+    def copy_with_stat(
+        self, source: str | os.PathLike[str], target: str | os.PathLike[str]
+    ) -> str:
+        """
+        Copies the file like `copy`, along with its permission bits and other
+        metadata, like `shutil.copy2`, so that a file moved across filesystems keeps
+        them. Can be given to `shutil.copytree` as `copy_function`.
+
+        Returns:
+            str: The target.
+        """
+        self.copy(source, target)
+        shutil.copystat(source, target)
+        return os.fspath(target)
+
+    def _copy(
+        self, source: str | os.PathLike[str], target: str | os.PathLike[str]
+    ) -> CopyStrategy:
+        if self._link and self._hardlink(source, target):
+            return CopyStrategy.HARDLINK
+
+        # Opening the target would truncate the source, as `shutil.copyfile` warns.
+        if os.path.exists(target) and os.path.samefile(source, target):
+            raise shutil.SameFileError(f"{source} and {target} are the same file")
+
+        with open(source, "rb") as source_file, open(target, "wb") as target_file:
+            size = os.fstat(source_file.fileno()).st_size
+            for strategy, function in self._strategies:
+                try:
+                    function(source_file, target_file, size)
+                    return strategy
+                except OSError as error:
+                    if error.errno not in _UNSUPPORTED:
+                        raise
+                    source_file.seek(0)
+                    target_file.seek(0)
+                    target_file.truncate()
+
+            _buffered(source_file, target_file, size)
+            return CopyStrategy.BUFFERED
+
+    @staticmethod
+    def _hardlink(
+        source: str | os.PathLike[str], target: str | os.PathLike[str]
+    ) -> bool:
+        # Replacing a link by itself would leave the temporary name behind.
+        if os.path.exists(target) and os.path.samefile(source, target):
+            return True
+        # Linking to a temporary name first allows replacing an existing target.
+        temporary = f"{os.fspath(target)}.tidysic-link"
+        # Left behind by an interrupted run.
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temporary)
+        try:
+            os.link(source, temporary)
+        except OSError as error:
+            if error.errno not in _UNSUPPORTED:
+                raise
+            return False
+        try:
+            os.replace(temporary, target)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+        return True
+
+    def log_summary(self) -> None:
+        """
+        Logs how many files were copied using each strategy.
+        """
+        if not self.counts:
+            return
+        message: list[str | Text] = ["Copy strategies used:"]
+        for strategy in CopyStrategy:
+            if strategy in self.counts:
+                message.append(
+                    Text.assemble(
+                        (strategy.value, "config"), f": {self.counts[strategy]} file(s)"
+                    )
+                )
+        log.info(message)
@@ -0,0 +1,32 @@
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+
+def connect(database: Optional[Path], read_only: bool = False) -> sqlite3.Connection:
+    """
+    Opens the given SQLite database, creating it if needed.
+
+    Connections may be used by several threads, provided their users serialize the
+    accesses.
+
+    Args:
+        database (Optional[Path]): File containing the database. If None, the database
+            only lives in memory.
+        read_only (bool): If true, the content of the database, if it exists, is
+            copied into memory instead, so that the file is neither created nor
+            modified.
+    """
+    if database is not None and not read_only:
+        return sqlite3.connect(database, check_same_thread=False)
+
+    connection = sqlite3.connect(":memory:", check_same_thread=False)
+    if database is not None and database.is_file():
+        source = sqlite3.connect(
+            f"{database.resolve().as_uri()}?mode=ro", uri=True
+        )
+        try:
+            source.backup(connection)
+        finally:
+            source.close()
+    return connection
@@ -0,0 +1,152 @@
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable, TypeVar
+
+from tidysic.file.audio_file import AudioFile
+from tidysic.file.taggable import Taggable
+from tidysic.file.tag_reader import payload_range
+from tidysic.logger import Logger, String, Text
+from tidysic.parser import Tree
+from tidysic.policies import DuplicatePolicy
+
+log = Logger()
+
+# Size of the start of the payloads hashed first, so that most files of the same
+# payload size are told apart without hashing them whole.
+_PREFIX_SIZE = 64 * 1024
+
+_BUFFER_SIZE = 1024 * 1024
+
+_Key = TypeVar("_Key", bound=Hashable)
+
+
+@dataclass
+class _Payload:
+
+    file: AudioFile
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+    def hash(self, size: int) -> bytes:
+        """
+        Hashes the first `size` bytes of the payload, streaming it by chunks.
+        """
+        digest = hashlib.blake2b()
+        with open(self.file.path, "rb") as file:
+            file.seek(self.start)
+            remaining = min(size, self.size)
+            while remaining > 0 and (chunk := file.read(min(remaining, _BUFFER_SIZE))):
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest.digest()
+
+
+def _refine(
+    groups: Iterable[list[_Payload]],
+    key: Callable[[_Payload], _Key],
+    executor: ThreadPoolExecutor,
+) -> list[list[_Payload]]:
+    """
+    Splits each group by the given key, computed concurrently, and only keeps the
+    resulting groups of several payloads.
+    """
+    groups = list(groups)
+    payloads = [payload for group in groups for payload in group]
+    keys = iter(executor.map(key, payloads))
+
+    refined: list[list[_Payload]] = []
+    for group in groups:
+        split: dict[_Key, list[_Payload]] = defaultdict(list)
+        for payload in group:
+            split[next(keys)].append(payload)
+        refined.extend(group for group in split.values() if len(group) > 1)
+    return refined
+
+
+def find_duplicates(files: Iterable[AudioFile], jobs: int = 1) -> list[list[AudioFile]]:
+    """
+    Finds the audio files whose payloads are identical, regardless of their tags.
+
+    Files are first grouped by the size of their payload, which only requires reading
+    their headers, so that most of them are never hashed. Files sharing their payload
+    size are then told apart by hashing the start of their payloads, and only those
+    sharing this start as well are hashed whole.
+
+    Args:
+        files (Iterable[AudioFile]): Files among which to look for duplicates.
+        jobs (int): Number of files read concurrently.
+
+    Returns:
+        list[list[AudioFile]]: Groups of identical files.
+    """
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        payloads = executor.map(
+            lambda file: _Payload(file, *payload_range(file.path)), files
+        )
+        by_size: dict[int, list[_Payload]] = defaultdict(list)
+        for payload in payloads:
+            by_size[payload.size].append(payload)
+
+        groups = [group for group in by_size.values() if len(group) > 1]
+        groups = _refine(groups, lambda payload: payload.hash(_PREFIX_SIZE), executor)
+        groups = _refine(
+            # Payloads no longer than the prefix were already hashed whole.
+            [group for group in groups if group[0].size > _PREFIX_SIZE],
+            lambda payload: payload.hash(payload.size),
+            executor,
+        ) + [group for group in groups if group[0].size <= _PREFIX_SIZE]
+
+    return [[payload.file for payload in group] for group in groups]
+
+
+def select_kept(files: list[AudioFile], policy: DuplicatePolicy) -> AudioFile:
+    """
+    Returns the copy of a duplicated track to keep according to the given policy.
+    Ties are broken by path, so that the choice does not depend on the order of the
+    files.
+    """
+
+    def key(file: AudioFile) -> tuple[int, int, str]:
+        tags = 0
+        if policy is DuplicatePolicy.TAGGED:
+            tags = sum(
+                getattr(file, name) is not None for name in Taggable.get_tag_names()
+            )
+        return (tags, file.get_stat().st_mtime_ns, str(file.path))
+
+    return max(files, key=key)
+
+
+def remove_duplicates(tree: Tree, policy: DuplicatePolicy, jobs: int = 1) -> int:
+    """
+    Finds the duplicated tracks across all the nodes of the given tree, and removes
+    all copies but the one chosen by the given policy from their nodes, so that they
+    are left in place by the organizer.
+
+    Returns:
+        int: Number of removed copies.
+    """
+    nodes = {file: node for node in tree.nodes() for file in node.audio_files}
+    removed = 0
+    for group in find_duplicates(nodes, jobs):
+        kept = select_kept(group, policy)
+        message: list[String] = [
+            Text.assemble(
+                "Found duplicates of ",
+                (str(kept.path), "path"),
+                f", which is kept over {len(group) - 1} other file(s):",
+            )
+        ]
+        for file in group:
+            if file is not kept:
+                nodes[file].audio_files.discard(file)
+                message.append(Text(str(file.path), "path"))
+                removed += 1
+        log.warn(message)
+    return removed
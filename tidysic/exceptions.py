@@ -1,7 +1,8 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
+from tidysic.collision import Collision
 from tidysic.file.taggable import Taggable
 from tidysic.file.tagged_file import TaggedFile
 from tidysic.logger import Logger, Message, String, Text
@@ -22,27 +23,55 @@ class CollisionException(TidysicException):
     """
     Exception raised when two or more files are to be moved or copied to the same
     target.
+
+    If several collisions were found at once, all of them are reported, the first one
+    being given by `files` and `target`.
     """
 
-    def __init__(self, files: list[TaggedFile], target: Path):
+    def __init__(
+        self,
+        files: list[TaggedFile],
+        target: Path,
+        collisions: Optional[list[Collision]] = None,
+    ):
         self.files = files
         self.target = target
+        self.collisions = collisions or [Collision(target, files)]
 
     def get_error_message(self) -> Message:
+        message: list[String] = []
+        if len(self.collisions) > 1:
+            message.append(f"Found {len(self.collisions)} collisions.")
+        for collision in self.collisions:
+            message.extend(self.get_collision_message(collision))
+        return message
+
+    @staticmethod
+    def get_collision_message(collision: Collision) -> list[String]:
         message: list[String] = []
         message.append(
             Text.assemble(
                 "more than one file have the same target: ",
-                (str(self.target), "path"),
+                (str(collision.target), "path"),
             )
         )
         message.append("They are the following:")
-        for file in self.files:
+        for file in collision.sources:
             message.append(Text(str(file.path), "path"))
-        message.append(
-            "Consider adapting the structure using different tags to"
-            " differentiate them."
-        )
+        tag = collision.suggested_tag
+        if tag is None:
+            message.append(
+                "Consider adapting the structure using different tags to"
+                " differentiate them."
+            )
+        else:
+            message.append(
+                Text.assemble(
+                    "Consider adding the ",
+                    (tag, "tag"),
+                    " tag to the structure to differentiate them.",
+                )
+            )
         return message
 
 
@@ -78,6 +107,21 @@ class EmptyStringException(TidysicException):
         return message
 
 
+class PlanException(TidysicException):
+    """
+    Exception raised when a plan file cannot be read.
+    """
+
+    def __init__(self, path: Path, reason: str):
+        self.path = path
+        self.reason = reason
+
+    def get_error_message(self) -> Message:
+        return Text.assemble(
+            "Invalid plan ", (str(self.path), "path"), f": {self.reason}."
+        )
+
+
 class UnknownTagException(TidysicException):
     def __init__(self, tag_name: str):
         self.tag_name = tag_name
@@ -1,15 +1,21 @@
+import os
+import sys
 from pathlib import Path
+from typing import Optional
 
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import ID3NoHeaderError
+from tidysic.file.tag_reader import read_tags
+from tidysic.file.taggable import Taggable
 from tidysic.file.tagged_file import TaggedFile
 
 
 class AudioFile(TaggedFile):
     """
-    Audio file with its tags parsed by mutagen, for easy acces.
+    Audio file with its tags parsed from its headers, for easy acces. Mutagen is only
+    used for the files the header-only reader does not handle.
     """
 
+    __slots__ = ("extension",)
+
     extensions = {
         ".flac",
         ".mp3",
@@ -17,21 +23,43 @@ class AudioFile(TaggedFile):
         ".wav",
     }
 
-    def __init__(self, path: Path):
-        super().__init__(path)
-        self.extension: str = self.path.suffix
+    def __init__(
+        self,
+        path: Path,
+        tags: Optional[dict[str, str]] = None,
+        stat: Optional[os.stat_result] = None,
+    ):
+        """
+        Args:
+            path (Path): Path of the audio file.
+            tags (Optional[dict[str, str]]): Tags of the file, if they are already
+                known. Otherwise, they are parsed from the file itself.
+            stat (Optional[os.stat_result]): Status of the file, if it was already
+                queried.
+        """
+        super().__init__(path, stat)
+        self.extension: str = sys.intern(self.path.suffix)
 
-        self._parse()
+        self._parse(tags)
 
-    def _parse(self) -> None:
-        tags = self._get_mutagen_tags()
+    def _parse(self, tags: Optional[dict[str, str]]) -> None:
+        if tags is None:
+            tags = read_tags(self.path)
+        if tags is None:
+            tags = self._get_mutagen_tags()
         self.set_tags(tags)
 
     def _get_mutagen_tags(self) -> dict[str, str]:
+        # Imported only when needed, since most files are handled without it.
+        from mutagen.easyid3 import EasyID3
+        from mutagen.id3 import ID3NoHeaderError
+
         try:
-            return {k: v[0] for k, v in EasyID3(self.path.resolve()).items()}
+            tags = EasyID3(os.fspath(self.path))
         except ID3NoHeaderError:
             return dict()
+        # Other keys, such as albumartist, are not tags of a `Taggable`.
+        return {k: tags[k][0] for k in Taggable.get_tag_names() if k in tags}
 
     @staticmethod
     def is_audio_file(path: Path) -> bool:
@@ -0,0 +1,84 @@
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from tidysic.database import connect
+
+
+class HashCache:
+    """
+    On-disk cache of the hashes of the contents of files.
+
+    Each entry is keyed by the device and inode of the file, so that it survives the
+    file being renamed, and is only considered valid as long as its size and
+    modification time stay the same.
+    """
+
+    filename = ".tidysic.hashes"
+    _version = 1
+
+    def __init__(self, database: Optional[Path], read_only: bool = False) -> None:
+        """
+        Opens the cache stored in the given file, creating it if needed.
+
+        Args:
+            database (Optional[Path]): File containing the cache. If None, the cache
+                only lives in memory.
+            read_only (bool): If true, the cache is read from the file, but the
+                changes only live in memory.
+        """
+        # Files are compared by several I/O workers at once.
+        self._connection = connect(database, read_only)
+        self._lock = threading.Lock()
+
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != self._version:
+            self._connection.execute("DROP TABLE IF EXISTS hashes")
+            self._connection.execute(f"PRAGMA user_version = {self._version}")
+
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            "device INTEGER, inode INTEGER, method TEXT, size INTEGER, "
+            "mtime_ns INTEGER, digest BLOB, PRIMARY KEY (device, inode, method))"
+        )
+
+    def get(self, stat: os.stat_result, method: str) -> Optional[bytes]:
+        """
+        Returns the cached hash of the given file computed with the given method, or
+        None if it is missing or stale.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size, mtime_ns, digest FROM hashes "
+                "WHERE device = ? AND inode = ? AND method = ?",
+                (stat.st_dev, stat.st_ino, method),
+            ).fetchone()
+        if row is None or tuple(row[:2]) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        digest: bytes = row[2]
+        return digest
+
+    def put(self, stat: os.stat_result, method: str, digest: bytes) -> None:
+        """
+        Stores the hash of the given file computed with the given method.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    stat.st_dev,
+                    stat.st_ino,
+                    method,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    digest,
+                ),
+            )
+
+    def close(self) -> None:
+        """
+        Writes the changes to the disk and closes the cache.
+        """
+        self._connection.commit()
+        self._connection.close()
@@ -0,0 +1,135 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from tidysic.database import connect
+from tidysic.file.taggable import Taggable
+from tidysic.logger import Logger, Text
+
+log = Logger()
+
+
+class TagCache:
+    """
+    On-disk cache of the tags of audio files.
+
+    Each entry is keyed by the absolute path of the file, and is only considered valid
+    as long as the inode, size and modification time of the file stay the same.
+    """
+
+    filename = ".tidysic.cache"
+    _version = 1
+
+    def __init__(self, database: Optional[Path], read_only: bool = False) -> None:
+        """
+        Opens the cache stored in the given file, creating it if needed.
+
+        Args:
+            database (Optional[Path]): File containing the cache. If None, the cache
+                only lives in memory.
+            read_only (bool): If true, the cache is read from the file, but the
+                changes only live in memory.
+        """
+        # The asynchronous pipeline parses in a background thread, but the cache is
+        # never used by two threads at once.
+        self._connection = connect(database, read_only)
+        self._seen: set[str] = set()
+        self.hits = 0
+        self.misses = 0
+
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != self._version:
+            self._connection.execute("DROP TABLE IF EXISTS tags")
+            self._connection.execute(f"PRAGMA user_version = {self._version}")
+
+        columns = ", ".join(f"{name} TEXT" for name in Taggable.get_tag_names())
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tags ("
+            "path TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, "
+            f"{columns})"
+        )
+
+    def get(self, path: Path, stat: os.stat_result) -> Optional[dict[str, str]]:
+        """
+        Returns the cached tags of the given file, or None if they are missing or
+        stale.
+        """
+        key = os.path.abspath(path)
+        self._seen.add(key)
+
+        row = self._connection.execute(
+            "SELECT * FROM tags WHERE path = ?", (key,)
+        ).fetchone()
+        if row is None or tuple(row[1:4]) != self._stamp(stat):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            name: value
+            for name, value in zip(Taggable.get_tag_names(), row[4:])
+            if value is not None
+        }
+
+    def put(self, path: Path, stat: os.stat_result, taggable: Taggable) -> None:
+        """
+        Stores the tags of the given file.
+        """
+        key = os.path.abspath(path)
+        self._seen.add(key)
+
+        tags = tuple(getattr(taggable, name) for name in Taggable.get_tag_names())
+        placeholders = ", ".join("?" * (4 + len(tags)))
+        self._connection.execute(
+            f"INSERT OR REPLACE INTO tags VALUES ({placeholders})",
+            (key, *self._stamp(stat), *tags),
+        )
+
+    def clear(self) -> None:
+        """
+        Removes every entry of the cache.
+        """
+        self._connection.execute("DELETE FROM tags")
+
+    def prune(self, root: Path) -> int:
+        """
+        Removes the entries of the files found under `root` that have neither been
+        looked up nor stored since the cache was opened.
+
+        Returns:
+            int: Number of removed entries.
+        """
+        prefix = os.path.join(os.path.abspath(root), "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self._connection.execute(
+            "SELECT path FROM tags WHERE path >= ? AND path < ?", (prefix, upper)
+        )
+        stale = [(path,) for (path,) in rows if path not in self._seen]
+        self._connection.executemany("DELETE FROM tags WHERE path = ?", stale)
+        return len(stale)
+
+    def commit(self) -> None:
+        """
+        Writes the changes to the disk, keeping the cache open.
+        """
+        self._connection.commit()
+
+    def close(self) -> None:
+        """
+        Writes the changes to the disk and closes the cache.
+        """
+        log.info(
+            Text.assemble(
+                "Tag cache: ",
+                (str(self.hits), "config"),
+                " hit(s), ",
+                (str(self.misses), "config"),
+                " miss(es).",
+            )
+        )
+        self._connection.commit()
+        self._connection.close()
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> tuple[int, int, int]:
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,492 @@
+import io
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+# Frames of ID3v2.3 and ID3v2.4 tags holding the supported tags.
+_ID3_FRAMES = {
+    b"TALB": "album",
+    b"TPE1": "artist",
+    b"TIT2": "title",
+    b"TCON": "genre",
+    b"TRCK": "tracknumber",
+    b"TDRC": "date",
+    b"TYER": "date",
+}
+
+# Frames of ID3v2.2 tags holding the supported tags.
+_ID3V22_FRAMES = {
+    b"TAL": "album",
+    b"TP1": "artist",
+    b"TT2": "title",
+    b"TCO": "genre",
+    b"TRK": "tracknumber",
+    b"TYE": "date",
+}
+
+_ID3_ENCODINGS = ("latin-1", "utf-16", "utf-16-be", "utf-8")
+
+# Fields of Vorbis comments holding the supported tags, in upper case.
+_VORBIS_FIELDS = {
+    "ALBUM": "album",
+    "ARTIST": "artist",
+    "TITLE": "title",
+    "GENRE": "genre",
+    "TRACKNUMBER": "tracknumber",
+    "DATE": "date",
+}
+
+# Subchunks of the INFO list of WAV files holding the supported tags.
+_RIFF_INFO = {
+    b"IPRD": "album",
+    b"IART": "artist",
+    b"INAM": "title",
+    b"IGNR": "genre",
+    b"ITRK": "tracknumber",
+    b"IPRT": "tracknumber",
+    b"ICRD": "date",
+}
+
+_TAG_COUNT = 6
+
+# Upper bound on the size of a single field, guarding against corrupted lengths.
+_MAX_FIELD_SIZE = 1024 * 1024
+
+# Upper bound on the size of the Ogg pages read before giving up on the comments.
+_MAX_OGG_HEADER_SIZE = 16 * 1024 * 1024
+
+_FLAC_VORBIS_COMMENT = 4
+
+
+class _Malformed(Exception):
+    """
+    Raised when a header does not match its format, so that the file is left to
+    mutagen instead.
+    """
+
+
+def read_tags(path: Path) -> Optional[dict[str, str]]:
+    """
+    Reads the supported tags of the given audio file, only reading the headers
+    holding them rather than parsing the whole file.
+
+    Supports ID3v2 and ID3v1 tags, FLAC and Ogg Vorbis or Opus comments, and the INFO
+    and id3 chunks of WAV files.
+
+    Args:
+        path (Path): Path of the audio file.
+
+    Returns:
+        Optional[dict[str, str]]: Tags of the file, or None if its format is not
+            recognized, in which case it should be parsed by mutagen.
+    """
+    with open(path, "rb") as file:
+        magic = file.read(12)
+        reader = _find_reader(magic)
+        if reader is None:
+            return None
+        file.seek(0)
+        try:
+            return reader(file)
+        except (_Malformed, struct.error, UnicodeDecodeError):
+            return None
+
+
+def _find_reader(magic: bytes) -> Optional[Callable[[BinaryIO], dict[str, str]]]:
+    if magic.startswith(b"ID3"):
+        return _read_id3_file
+    if magic.startswith(b"fLaC"):
+        return _read_flac
+    if magic.startswith(b"OggS"):
+        return _read_ogg
+    if magic.startswith(b"RIFF") and magic[8:12] == b"WAVE":
+        return _read_wav
+    if magic[:2] in (b"\xff\xfb", b"\xff\xfa", b"\xff\xf3", b"\xff\xf2", b"\xff\xe3"):
+        # MPEG audio without ID3v2 tag, which may still have an ID3v1 one.
+        return _read_id3_file
+    return None
+
+
+def _read(file: BinaryIO, size: int) -> bytes:
+    if size > _MAX_FIELD_SIZE:
+        raise _Malformed(f"field of {size} bytes")
+    data = file.read(size)
+    if len(data) < size:
+        raise _Malformed("truncated header")
+    return data
+
+
+def _read_id3_file(file: BinaryIO) -> dict[str, str]:
+    """
+    Reads the ID3v2 tag at the start of the file if any, completed by the ID3v1 tag at
+    its end, like mutagen does.
+    """
+    tags = _read_id3v2(file) if file.read(3) == b"ID3" else {}
+    if len(tags) < _TAG_COUNT:
+        for name, value in _read_id3v1(file).items():
+            tags.setdefault(name, value)
+    return tags
+
+
+def _syncsafe(data: bytes) -> int:
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _read_id3v2(file: BinaryIO) -> dict[str, str]:
+    """
+    Reads the ID3v2 tag whose "ID3" identifier was just read, only reading the bodies
+    of the frames holding supported tags.
+    """
+    version, _, flags, *size = _read(file, 7)
+    if version not in (2, 3, 4):
+        raise _Malformed(f"ID3v2.{version}")
+    end = file.tell() + _syncsafe(bytes(size))
+
+    if flags & 0x80 and version < 4:
+        # The whole tag is unsynchronised, hence must be decoded at once.
+        data = _read(file, end - file.tell()).replace(b"\xff\x00", b"\xff")
+        return _read_id3v2_frames(io.BytesIO(data), version, flags, len(data))
+    tags = _read_id3v2_frames(file, version, flags, end)
+    file.seek(end)
+    return tags
+
+
+def _read_id3v2_frames(
+    file: BinaryIO, version: int, flags: int, end: int
+) -> dict[str, str]:
+    if version == 2:
+        if flags & 0x40:
+            raise _Malformed("compressed ID3v2.2 tag")
+        header_size, frames = 6, _ID3V22_FRAMES
+    else:
+        header_size, frames = 10, _ID3_FRAMES
+        if flags & 0x40:
+            # Skips the extended header, whose size includes itself in ID3v2.4 only.
+            extended = _read(file, 4)
+            if version == 4:
+                file.seek(_syncsafe(extended) - 4, os.SEEK_CUR)
+            else:
+                file.seek(_uint32(extended), os.SEEK_CUR)
+
+    tags: dict[str, str] = {}
+    while file.tell() + header_size <= end and len(tags) < _TAG_COUNT:
+        header = _read(file, header_size)
+        if header[0] == 0:
+            # Reached the padding.
+            break
+        identifier, size, frame_flags = _parse_id3v2_frame_header(header, version)
+        name = frames.get(identifier)
+        if name is None or name in tags:
+            file.seek(size, os.SEEK_CUR)
+            continue
+        data = _id3v2_frame_data(_read(file, size), version, frame_flags)
+        if data:
+            value = _decode_id3_text(data)
+            if value:
+                tags[name] = _genre(value) if name == "genre" else value
+    return tags
+
+
+def _parse_id3v2_frame_header(header: bytes, version: int) -> tuple[bytes, int, int]:
+    """
+    Returns the identifier, size and flags of a frame given its header.
+    """
+    if version == 2:
+        return header[:3], _uint24(header[3:]), 0
+    size = _syncsafe(header[4:8]) if version == 4 else _uint32(header[4:8])
+    return header[:4], size, int.from_bytes(header[8:], "big")
+
+
+def _id3v2_frame_data(data: bytes, version: int, flags: int) -> Optional[bytes]:
+    """
+    Returns the content of a frame given its flags, or None if it is compressed or
+    encrypted.
+    """
+    if version == 3:
+        return None if flags & 0x00C0 else data
+    if version == 4:
+        if flags & 0x000C:
+            return None
+        if flags & 0x0001:
+            # Data length indicator.
+            data = data[4:]
+        if flags & 0x0002:
+            data = data.replace(b"\xff\x00", b"\xff")
+    return data
+
+
+def _decode_id3_text(data: bytes) -> str:
+    encoding = data[0]
+    if encoding >= len(_ID3_ENCODINGS):
+        raise _Malformed(f"text encoding {encoding}")
+    text = data[1:].decode(_ID3_ENCODINGS[encoding])
+    # ID3v2.4 separates multiple values with null characters, keep the first one.
+    return text.split("\x00")[0]
+
+
+def _genre(value: str) -> str:
+    """
+    Resolves numeric ID3 genres, such as "17" or "(17)", to their names.
+    """
+    if value.isdecimal() or value.startswith("("):
+        from mutagen.id3 import TCON
+
+        frame = TCON(encoding=0, text=[value])  # type: ignore[no-untyped-call]
+        genres: list[str] = frame.genres
+        return genres[0] if genres else value
+    return value
+
+
+def _read_id3v1(file: BinaryIO) -> dict[str, str]:
+    file.seek(0, os.SEEK_END)
+    if file.tell() < 128:
+        return {}
+    file.seek(-128, os.SEEK_END)
+    data = file.read(128)
+    if not data.startswith(b"TAG"):
+        return {}
+
+    def text(field: bytes) -> str:
+        return field.split(b"\x00")[0].strip().decode("latin-1")
+
+    tags = {
+        "title": text(data[3:33]),
+        "artist": text(data[33:63]),
+        "album": text(data[63:93]),
+        "date": text(data[93:97]),
+    }
+    comment = data[97:127]
+    if comment[-2] == 0 and comment[-1] != 0:
+        tags["tracknumber"] = str(comment[-1])
+    if data[127] != 255:
+        tags["genre"] = _genre(str(data[127]))
+    return {name: value for name, value in tags.items() if value}
+
+
+def _uint24(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+
+def _uint32(data: bytes) -> int:
+    value: int = struct.unpack(">I", data)[0]
+    return value
+
+
+def _read_flac(file: BinaryIO) -> dict[str, str]:
+    """
+    Reads the Vorbis comment block of a FLAC file, skipping over the other metadata
+    blocks.
+    """
+    file.seek(4)
+    while True:
+        header = _read(file, 4)
+        block_type = header[0] & 0x7F
+        size = _uint24(header[1:])
+        if block_type == _FLAC_VORBIS_COMMENT:
+            return _parse_vorbis_comment(_read(file, size))
+        if header[0] & 0x80:
+            return {}
+        file.seek(size, os.SEEK_CUR)
+
+
+def _parse_vorbis_comment(data: bytes) -> dict[str, str]:
+    (vendor_size,) = struct.unpack_from("<I", data)
+    offset = 4 + vendor_size
+    (count,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+
+    tags: dict[str, str] = {}
+    for _ in range(count):
+        (size,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        comment = data[offset:offset + size]
+        offset += size
+        key, _, value = comment.partition(b"=")
+        name = _VORBIS_FIELDS.get(key.decode("ascii", "replace").upper())
+        if name is not None and name not in tags:
+            tags[name] = value.decode("utf-8", "replace")
+    return tags
+
+
+def _read_ogg(file: BinaryIO) -> dict[str, str]:
+    """
+    Reads the comment header of an Ogg Vorbis or Opus stream, which is its second
+    packet, reassembling it from as many pages as needed.
+    """
+    packets: list[bytes] = []
+    packet = b""
+    read = 0
+    while len(packets) < 2:
+        header = _read(file, 27)
+        if not header.startswith(b"OggS"):
+            raise _Malformed("missing Ogg page")
+        lacing = _read(file, header[26])
+        body = _read(file, sum(lacing))
+        read += 27 + len(lacing) + len(body)
+        if read > _MAX_OGG_HEADER_SIZE:
+            raise _Malformed("Ogg headers too large")
+
+        offset = 0
+        for size in lacing:
+            packet += body[offset:offset + size]
+            offset += size
+            if size < 255:
+                packets.append(packet)
+                packet = b""
+
+    comments = packets[1]
+    if comments.startswith(b"\x03vorbis"):
+        return _parse_vorbis_comment(comments[7:])
+    if comments.startswith(b"OpusTags"):
+        return _parse_vorbis_comment(comments[8:])
+    raise _Malformed("unsupported Ogg codec")
+
+
+def _read_wav(file: BinaryIO) -> dict[str, str]:
+    """
+    Reads the INFO list and the id3 chunk of a WAV file, the latter taking precedence
+    like in mutagen, skipping over the other chunks.
+    """
+    file.seek(12)
+    info: dict[str, str] = {}
+    id3: dict[str, str] = {}
+    while header := file.read(8):
+        if len(header) < 8:
+            break
+        identifier = header[:4]
+        (size,) = struct.unpack("<I", header[4:])
+        start = file.tell()
+        if identifier == b"LIST" and file.read(4) == b"INFO":
+            info = _parse_riff_info(_read(file, size - 4))
+        elif identifier in (b"id3 ", b"ID3 ") and file.read(3) == b"ID3":
+            id3 = _read_id3v2(file)
+        file.seek(start + size + size % 2)
+    return {**info, **id3}
+
+
+def _parse_riff_info(data: bytes) -> dict[str, str]:
+    tags: dict[str, str] = {}
+    offset = 0
+    while offset + 8 <= len(data):
+        identifier = data[offset:offset + 4]
+        (size,) = struct.unpack_from("<I", data, offset + 4)
+        value = data[offset + 8:offset + 8 + size].split(b"\x00")[0]
+        offset += 8 + size + size % 2
+        name = _RIFF_INFO.get(identifier)
+        if name is not None and value and name not in tags:
+            try:
+                tags[name] = value.decode("utf-8")
+            except UnicodeDecodeError:
+                tags[name] = value.decode("latin-1")
+    return tags
+
+
+def payload_range(path: Path) -> tuple[int, int]:
+    """
+    Locates the audio payload of the given file, that is to say its content without
+    the tags and other metadata, so that copies of a track tagged differently have
+    the same payload.
+
+    Supports the same formats as `read_tags`, plus APEv2 tags at the end of files.
+
+    Args:
+        path (Path): Path of the audio file.
+
+    Returns:
+        tuple[int, int]: Offsets of the start and end of the payload. The payload of
+            a file whose format is not recognized is the whole file.
+    """
+    with open(path, "rb") as file:
+        size = os.fstat(file.fileno()).st_size
+        locate = _find_payload_locator(file.read(12))
+        if locate is None:
+            return 0, size
+        file.seek(0)
+        try:
+            start, end = locate(file, size)
+        except (_Malformed, struct.error):
+            return 0, size
+        return start, max(start, end)
+
+
+def _find_payload_locator(
+    magic: bytes,
+) -> Optional[Callable[[BinaryIO, int], tuple[int, int]]]:
+    reader = _find_reader(magic)
+    if reader is _read_id3_file:
+        return _locate_mpeg_payload
+    if reader is _read_flac:
+        return _locate_flac_payload
+    if reader is _read_ogg:
+        return _locate_ogg_payload
+    if reader is _read_wav:
+        return _locate_wav_payload
+    return None
+
+
+def _trailing_tags_start(file: BinaryIO, size: int) -> int:
+    """
+    Returns the offset of the ID3v1 and APEv2 tags at the end of the file if any, or
+    its size otherwise.
+    """
+    end = size
+    if end >= 128:
+        file.seek(end - 128)
+        if file.read(3) == b"TAG":
+            end -= 128
+    if end >= 32:
+        file.seek(end - 32)
+        footer = file.read(32)
+        if footer.startswith(b"APETAGEX"):
+            # The size covers the items and the footer, but not the optional header.
+            (tag_size, _, flags) = struct.unpack_from("<III", footer, 12)
+            end -= tag_size + (32 if flags & 0x80000000 else 0)
+    return end
+
+
+def _locate_mpeg_payload(file: BinaryIO, size: int) -> tuple[int, int]:
+    start = 0
+    if file.read(3) == b"ID3":
+        header = _read(file, 7)
+        start = 10 + _syncsafe(header[3:7])
+        # ID3v2.4 tags may end with a footer.
+        if header[2] & 0x10:
+            start += 10
+    return start, _trailing_tags_start(file, size)
+
+
+def _locate_flac_payload(file: BinaryIO, size: int) -> tuple[int, int]:
+    file.seek(4)
+    while True:
+        header = _read(file, 4)
+        file.seek(_uint24(header[1:]), os.SEEK_CUR)
+        if header[0] & 0x80:
+            return file.tell(), _trailing_tags_start(file, size)
+
+
+def _locate_ogg_payload(file: BinaryIO, size: int) -> tuple[int, int]:
+    """
+    Locates the first audio page of an Ogg stream, the pages holding its headers all
+    having a granule position of zero.
+    """
+    while file.tell() < _MAX_OGG_HEADER_SIZE:
+        start = file.tell()
+        header = _read(file, 27)
+        if not header.startswith(b"OggS"):
+            raise _Malformed("missing Ogg page")
+        (granule_position,) = struct.unpack_from("<q", header, 6)
+        if granule_position != 0:
+            return start, size
+        file.seek(sum(_read(file, header[26])), os.SEEK_CUR)
+    raise _Malformed("Ogg headers too large")
+
+
+def _locate_wav_payload(file: BinaryIO, size: int) -> tuple[int, int]:
+    file.seek(12)
+    while len(header := file.read(8)) == 8:
+        (chunk_size,) = struct.unpack("<I", header[4:])
+        if header[:4] == b"data":
+            return file.tell(), file.tell() + chunk_size
+        file.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+    raise _Malformed("missing data chunk")
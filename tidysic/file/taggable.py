@@ -1,12 +1,17 @@
+import sys
 from dataclasses import asdict, dataclass, fields
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Taggable:
     """
     Base class for anything that can hold tags. Audio files are such files obviously,
     but so are folders containing audio files, and tree nodes in the parser module.
+
+    Instances have no `__dict__`, and tag values are interned when set through
+    `set_tags`, so that the many files sharing an artist or an album share the same
+    strings.
     """
 
     album: Optional[str] = None
@@ -21,7 +26,7 @@ class Taggable:
 
     def set_tags(self, tags: dict[str, str]) -> None:
         for k, v in tags.items():
-            setattr(self, k, v)
+            setattr(self, k, sys.intern(v) if isinstance(v, str) else v)
 
     @staticmethod
     def intersection(taggables: tuple["Taggable", ...]) -> Optional["Taggable"]:
@@ -1,4 +1,6 @@
+import os
 from pathlib import Path
+from typing import Optional
 
 from tidysic.file.taggable import Taggable
 
@@ -8,8 +10,27 @@ class TaggedFile(Taggable):
     Base class for any file that can hold tags. Audio files are such files
     obviously, but so are folders containing audio files.
     """
-    def __init__(self, path: Path):
+
+    __slots__ = ("path", "stat")
+
+    def __init__(self, path: Path, stat: Optional[os.stat_result] = None):
+        """
+        Args:
+            path (Path): Path of the file.
+            stat (Optional[os.stat_result]): Status of the file, if it was already
+                queried, for instance while listing its directory.
+        """
+        super().__init__()
         self.path: Path = path
+        self.stat: Optional[os.stat_result] = stat
+
+    def get_stat(self) -> os.stat_result:
+        """
+        Returns the status of the file, querying it only if it is not known yet.
+        """
+        if self.stat is None:
+            self.stat = self.path.stat()
+        return self.stat
 
     def __hash__(self) -> int:
         return hash(self.path)
@@ -0,0 +1,92 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from tidysic.database import connect
+
+
+class History:
+    """
+    Record of the files already organized into a target directory, used by the
+    incremental mode to only process new or modified files.
+
+    Each entry maps a source file, identified by its absolute path, inode, size and
+    modification time at the time it was organized, to the target it was placed at.
+    """
+
+    filename = ".tidysic.history"
+    _version = 1
+
+    def __init__(self, database: Optional[Path], read_only: bool = False) -> None:
+        """
+        Opens the history stored in the given file, creating it if needed.
+
+        Args:
+            database (Optional[Path]): File containing the history. If None, the
+                history only lives in memory.
+            read_only (bool): If true, the history is read from the file, but the
+                changes only live in memory.
+        """
+        self._connection = connect(database, read_only)
+
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version != self._version:
+            self._connection.execute("DROP TABLE IF EXISTS organized")
+            self._connection.execute(f"PRAGMA user_version = {self._version}")
+
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS organized ("
+            "source TEXT PRIMARY KEY, inode INTEGER, size INTEGER, mtime_ns INTEGER, "
+            "target TEXT)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS organized_target ON organized (target)"
+        )
+
+    def is_placed(self, source: Path, stat: os.stat_result, target: Path) -> bool:
+        """
+        Returns true if the given file was already organized to the given target, and
+        has not been modified since.
+        """
+        row = self._connection.execute(
+            "SELECT inode, size, mtime_ns, target FROM organized WHERE source = ?",
+            (os.path.abspath(source),),
+        ).fetchone()
+        return row is not None and tuple(row) == (
+            *self._stamp(stat),
+            os.path.abspath(target),
+        )
+
+    def owner(self, target: Path) -> Optional[Path]:
+        """
+        Returns the source of the file that was organized to the given target, if any.
+        """
+        row = self._connection.execute(
+            "SELECT source FROM organized WHERE target = ?",
+            (os.path.abspath(target),),
+        ).fetchone()
+        return None if row is None else Path(row[0])
+
+    def record(self, source: Path, stat: os.stat_result, target: Path) -> None:
+        """
+        Records that the given file was organized to the given target.
+        """
+        target_key = os.path.abspath(target)
+        self._connection.execute(
+            "DELETE FROM organized WHERE target = ?", (target_key,)
+        )
+        self._connection.execute(
+            "INSERT OR REPLACE INTO organized VALUES (?, ?, ?, ?, ?)",
+            (os.path.abspath(source), *self._stamp(stat), target_key),
+        )
+
+    def close(self) -> None:
+        """
+        Writes the changes to the disk and closes the history.
+        """
+        self._connection.commit()
+        self._connection.close()
+
+    @staticmethod
+    def _stamp(stat: os.stat_result) -> tuple[int, int, int]:
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
@@ -0,0 +1,135 @@
+import os
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Sequence
+
+from tidysic.logger import Logger, Text
+from tidysic.plan import Plan, PlanEntry
+
+log = Logger()
+
+# Index of a completed entry.
+_RECORD = struct.Struct("<Q")
+
+
+def _sync_directory(directory: Path) -> None:
+    """
+    Waits for the entries of the given directory to be written to disk.
+    """
+    file_descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+class Journal:
+    """
+    Write-ahead record of the operations of a run, allowing an interrupted run to
+    resume the remaining operations without parsing the source again.
+
+    The operations are written as a plan, synced to disk before any of them is
+    applied. The index of each applied operation is then appended to a second file,
+    which is only synced once every `sync_every` operations: after an interruption,
+    the operations applied since the last sync are detected by their source being
+    gone, or applied again.
+    """
+
+    filename = ".tidysic.journal"
+
+    def __init__(self, path: Path, sync_every: int = 256) -> None:
+        """
+        Args:
+            path (Path): File containing the operations. The applied ones are recorded
+                next to it, with a `.done` suffix.
+            sync_every (int): Number of operations recorded between two syncs.
+        """
+        self._path = path
+        self._done_path = path.with_name(path.name + ".done")
+        self._sync_every = sync_every
+        self._done: set[int] = set()
+        self._file: Optional[BinaryIO] = None
+        self._unsynced = 0
+        self.plan: Optional[Plan] = None
+
+        if path.exists():
+            self.plan = Plan(path)
+            self._load()
+            log.info(
+                Text.assemble(
+                    "Resuming from journal ",
+                    (str(path), "path"),
+                    f", skipping {len(self._done)} of {self.plan.count} operation(s).",
+                )
+            )
+
+    @property
+    def path(self) -> Path:
+        """
+        File containing the operations.
+        """
+        return self._path
+
+    def _load(self) -> None:
+        if not self._done_path.exists():
+            return
+        with open(self._done_path, "rb") as file:
+            data = file.read()
+        # A record cut short by the interruption is ignored.
+        end = len(data) - len(data) % _RECORD.size
+        self._done.update(index for (index,) in _RECORD.iter_unpack(data[:end]))
+
+    def start(
+        self, source: Path, target: Path, entries: Sequence[PlanEntry], move: bool
+    ) -> None:
+        """
+        Writes the operations of a new run, before any of them is applied.
+        """
+        # The operations recorded as applied belong to a previous journal.
+        self._done_path.unlink(missing_ok=True)
+        # The plan is only published once complete, so that an interruption while
+        # writing it leaves either no journal or the previous one.
+        temporary = self._path.with_name(self._path.name + ".tmp")
+        Plan.write(temporary, source, target, entries, len(entries), move, sync=True)
+        os.replace(temporary, self._path)
+        _sync_directory(self._path.parent)
+        self.plan = Plan(self._path)
+
+    def pending(self) -> Iterator[PlanEntry]:
+        """
+        Yields the operations that are not recorded as applied.
+        """
+        assert self.plan is not None, "the journal was not started"
+        for entry in self.plan.entries():
+            if entry.index not in self._done:
+                yield entry
+
+    def complete(self, index: int) -> None:
+        """
+        Records that the operation of the given index was applied.
+        """
+        if self._file is None:
+            self._file = open(self._done_path, "ab")
+        self._file.write(_RECORD.pack(index))
+        self._done.add(index)
+        self._unsynced += 1
+        if self._unsynced >= self._sync_every:
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self, finished: bool) -> None:
+        """
+        Closes the journal, deleting it if the run it records is finished.
+        """
+        if self._file is not None:
+            self._sync()
+            self._file.close()
+            self._file = None
+        if finished:
+            self._path.unlink(missing_ok=True)
+            self._done_path.unlink(missing_ok=True)
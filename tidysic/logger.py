@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import json
+import sys
+from contextlib import contextmanager
 from enum import IntEnum
-from typing import Iterable, TypeAlias
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterator, TypeAlias
 
-from rich.console import Console
-from rich.progress import ProgressType
-from rich.progress import track as rich_track
-from rich.text import Text as Text  # Explicit re-export
-from rich.theme import Theme
+if TYPE_CHECKING:
+    import rich.text
+    from rich.console import Console
+    from rich.progress import Progress
 
 
 class LogLevel(IntEnum):
@@ -18,19 +21,92 @@ class LogLevel(IntEnum):
     NONE = 4
 
 
+class Text:
+    """
+    Text made of spans with distinct styles, like `rich.text.Text`, but only
+    converted to it when displayed, so that rich is not imported unless a message is
+    actually displayed.
+    """
+
+    __slots__ = ("_spans",)
+
+    def __init__(self, text: str = "", style: str = "") -> None:
+        self._spans: list[tuple[str, str]] = [(text, style)] if text else []
+
+    @classmethod
+    def assemble(cls, *parts: str | tuple[str, str]) -> Text:
+        """
+        Builds a text from the given parts, each being either a string or a string
+        and its style.
+        """
+        text = cls()
+        for part in parts:
+            if isinstance(part, str):
+                text.append(part)
+            else:
+                text.append(*part)
+        return text
+
+    def append(self, text: str | Text, style: str = "") -> Text:
+        """
+        Appends the given text, with the given style if it is a string.
+        """
+        if isinstance(text, Text):
+            self._spans.extend(text._spans)
+        elif text:
+            self._spans.append((text, style))
+        return self
+
+    @property
+    def plain(self) -> str:
+        """
+        Text without its styles.
+        """
+        return "".join(text for text, _ in self._spans)
+
+    def __str__(self) -> str:
+        return self.plain
+
+    def __repr__(self) -> str:
+        return f"Text({self.plain!r})"
+
+    def to_rich(self) -> rich.text.Text:
+        import rich.text
+
+        return rich.text.Text.assemble(*self._spans)
+
+
 String: TypeAlias = str | Text
 Message: TypeAlias = list[String] | String
+# Message built only if it is displayed, so that hot paths do not pay for formatting
+# messages that the log level hides.
+LazyMessage: TypeAlias = Message | Callable[[], Message]
+
+# Styles of the spans of messages.
+theme = {
+    "info": "blue",
+    "warning": "red",
+    "error": "bold red",
+    "path": "underline dim",
+    "tag": "yellow",
+    "config": "green",
+}
+
 
-theme = Theme(
-    {
-        "info": "blue",
-        "warning": "red",
-        "error": "bold red",
-        "path": "underline dim",
-        "tag": "yellow",
-        "config": "green",
-    }
-)
+# Size of the buffer of the event log, so that events are written by large batches.
+_EVENTS_BUFFER_SIZE = 1024 * 1024
+
+# Compact JSON, without spaces after separators.
+_json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def format_size(size: int) -> str:
+    """
+    Formats the given number of bytes in a human readable way.
+    """
+    from rich.filesize import decimal
+
+    return decimal(size)
 
 
 class Logger:
@@ -44,56 +120,152 @@ class Logger:
         return cls._instance
 
     def __init__(self) -> None:
+        # Called again each time the instance is requested, for instance by modules
+        # imported once the level is set.
+        if hasattr(self, "_level"):
+            return
         self._level = LogLevel.WARN
-        self._stdout = Console(theme=theme)
-        self._stderr = Console(theme=theme, stderr=True)
+        # Consoles are created when first used, since importing rich takes time.
+        self._consoles: dict[bool, Console] = {}
+        # Whether messages and progress bars meant for the standard output are
+        # displayed on the standard error instead.
+        self._redirected = False
+        self._events: BinaryIO | None = None
 
     def _set_loglevel(self, log_level: LogLevel) -> None:
         self._level = log_level
 
     level = property(fset=_set_loglevel)
 
-    def track(
-        self, sequence: Iterable[ProgressType], description: str, transient: bool
-    ) -> Iterable[ProgressType]:
+    def _console(self, stderr: bool = False) -> Console:
+        stderr = stderr or self._redirected
+        if stderr not in self._consoles:
+            from rich.console import Console
+            from rich.theme import Theme
+
+            self._consoles[stderr] = Console(theme=Theme(theme), stderr=stderr)
+        return self._consoles[stderr]
+
+    def open_events(self, path: Path | None) -> None:
         """
-        Wrapper for the track method using the correct console.
+        Starts writing events as JSON lines to the given file, or to the standard
+        output if None, in which case the console messages are displayed on the
+        standard error instead, so that the output can be parsed.
         """
-        yield from rich_track(
-            sequence, description=description, transient=transient, console=self._stdout
+        if path is None:
+            self._events = open(
+                sys.stdout.fileno(), "wb", _EVENTS_BUFFER_SIZE, closefd=False
+            )
+            self._redirected = True
+        else:
+            self._events = open(path, "wb", _EVENTS_BUFFER_SIZE)
+
+    def flush_events(self) -> None:
+        """
+        Writes the buffered events, for instance to let another process follow them.
+        """
+        if self._events is not None:
+            self._events.flush()
+
+    def close_events(self) -> None:
+        """
+        Writes the buffered events and stops writing events.
+        """
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+    @property
+    def events_enabled(self) -> bool:
+        """
+        Whether events are written, so that callers can skip preparing them otherwise.
+        """
+        return self._events is not None
+
+    def event(self, **fields: object) -> None:
+        """
+        If events are written, writes one with the given fields.
+        """
+        if self._events is not None:
+            self._events.write(_json_encoder.encode(fields).encode() + b"\n")
+
+    def is_enabled(self, level: LogLevel) -> bool:
+        """
+        Returns whether messages of the given level are displayed, so that callers can
+        skip the work of preparing them otherwise.
+        """
+        return self._level <= level
+
+    @contextmanager
+    def transfer(
+        self, total: int, description: str, transient: bool
+    ) -> Iterator[Callable[[int], None]]:
+        """
+        Displays a progress bar counting bytes, along with the transfer speed, using the
+        correct console.
+
+        Yields:
+            Callable[[int], None]: Function advancing the progress by the given number
+                of bytes.
+        """
+        with self._transfer_progress(transient) as progress:
+            task = progress.add_task(description, total=total)
+            yield lambda advance: progress.advance(task, advance)
+
+    def _transfer_progress(self, transient: bool) -> Progress:
+        from rich.progress import (
+            BarColumn,
+            DownloadColumn,
+            Progress,
+            TextColumn,
+            TimeRemainingColumn,
+            TransferSpeedColumn,
+        )
+
+        return Progress(
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            DownloadColumn(),
+            TransferSpeedColumn(),
+            TimeRemainingColumn(),
+            console=self._console(),
+            transient=transient,
         )
 
-    def info(self, message: Message) -> None:
+    def info(self, message: LazyMessage) -> None:
         """
         If the current log level permits it, displays useful information on the process.
+
+        The message may be given as a function returning it, only called if it is
+        displayed.
         """
         if self._level <= LogLevel.INFO:
             self._log(message, prefix="info")
 
-    def warn(self, message: Message) -> None:
+    def warn(self, message: LazyMessage) -> None:
         """
         If the current log level permits it, displays non-fatal errors.
         """
         if self._level <= LogLevel.WARN:
-            self._log(message, prefix="warning", console=self._stderr)
+            self._log(message, prefix="warning", stderr=True)
 
-    def error(self, message: Message) -> None:
+    def error(self, message: LazyMessage) -> None:
         """
         If the current log level permits it, displays fatal errors.
         """
         if self._level <= LogLevel.ERROR:
-            self._log(message, prefix="error", console=self._stderr)
+            self._log(message, prefix="error", stderr=True)
 
     def _log(
         self,
-        message: Message,
+        message: LazyMessage,
         prefix: str | None,
-        console: Console | None = None,
+        stderr: bool = False,
     ) -> None:
+        if callable(message):
+            message = message()
         text = Text()
 
-        console = console or self._stdout
-
         if prefix is not None:
             text.append(f"[{prefix}] ", prefix)
 
@@ -104,4 +276,4 @@ class Logger:
             text.append("\n\t")
             text.append(line)
 
-        console.print(text)
+        self._console(stderr).print(text.to_rich())
@@ -1,11 +1,14 @@
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Mapping, Optional
+from typing import Any, Callable, Iterator, Mapping, Optional, TypeVar
 
 import click
-import pkg_resources
 
 from tidysic.logger import Logger, LogLevel
-from tidysic.tidysic import Tidysic
+from tidysic.policies import CollisionPolicy, Comparison, DuplicatePolicy
+
+# The commands import the rest of the package themselves, so that the CLI starts
+# quickly, e.g. for `--help` or to report usage errors.
 
 log = Logger()
 
@@ -17,9 +20,10 @@ def dump_config(ctx: click.Context, param: click.Parameter, value: Any) -> None:
     """
     if not value or ctx.resilient_parsing:
         return
-    with pkg_resources.resource_stream("tidysic.settings", ".tidysic.default") as fp:
-        default_config = fp.read()
-        click.echo(default_config)
+    from importlib import resources
+
+    default_config = resources.files("tidysic.settings") / ".tidysic.default"
+    click.echo(default_config.read_bytes())
     ctx.exit()
 
 
@@ -51,11 +55,213 @@ class FallbackArgument(click.Argument):
         return super().handle_parse_result(ctx, opts, args)
 
 
-@click.command()
-@click.option(
-    "-v", "--verbose", is_flag=True, help="Show more information when running."
-)
-@click.version_option(version=pkg_resources.require("tidysic")[0].version)
+class DefaultGroup(click.Group):
+    """
+    Specializes `click.Group` to run a default command when the arguments do not start
+    with the name of a command, so that `tidysic SOURCE TARGET` keeps working.
+    """
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.default_command: str = kwargs.pop("default_command")
+        super().__init__(*args, **kwargs)
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        own_options = {name for param in self.get_params(ctx) for name in param.opts}
+        if args and args[0] not in self.commands and args[0] not in own_options:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+_Command = TypeVar("_Command", bound=Callable[..., Any])
+
+
+# Options and arguments shared by the commands that parse a source directory.
+_SCAN_OPTIONS = [
+    click.option(
+        "-v", "--verbose", is_flag=True, help="Show more information when running."
+    ),
+    click.option(
+        "--config",
+        "config_path",
+        type=click.Path(exists=True, file_okay=True, path_type=Path),
+        help="Optional, path to a .tidysic config file.",
+    ),
+    click.option(
+        "--move/--copy",
+        help="Defines which file operations to apply. Defaults to `copy`",
+    ),
+    click.option(
+        "--in-place",
+        is_eager=True,
+        is_flag=True,
+        help=(
+            "Sets the target folder to be the same as the source, and uses move "
+            "operations rather than copying the files. The TARGET argument must be "
+            "omitted when using this option."
+        ),
+    ),
+    click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="Number of audio files whose tags are read concurrently.",
+    ),
+    click.option(
+        "--no-cache",
+        is_flag=True,
+        help="Reads the tags of every file instead of using the tag cache.",
+    ),
+    click.option(
+        "--rebuild-cache",
+        is_flag=True,
+        help="Empties the tag cache before reading the tags of every file.",
+    ),
+    click.option(
+        "--incremental",
+        is_flag=True,
+        help=(
+            "Only organizes the files that are new or modified since they were last "
+            "organized into TARGET."
+        ),
+    ),
+    click.option(
+        "--duplicates",
+        type=click.Choice([policy.value for policy in DuplicatePolicy]),
+        help=(
+            "Leaves in place the copies of the tracks found several times in SOURCE, "
+            "regardless of their tags, but one: the one with the most tags "
+            "(`tagged`), or the most recently modified one (`newest`)."
+        ),
+    ),
+    click.option(
+        "--on-collision",
+        type=click.Choice([policy.value for policy in CollisionPolicy]),
+        default=CollisionPolicy.FAIL.value,
+        show_default=True,
+        help=(
+            "How to handle files whose targets collide: `fail` reports every "
+            "collision and aborts, `skip` leaves the colliding files in place, "
+            "`suffix` appends a number to their names, and `report` only reports the "
+            "collisions."
+        ),
+    ),
+    click.argument(
+        "source",
+        type=click.Path(
+            exists=True,
+            file_okay=False,
+            path_type=Path,
+        ),
+    ),
+    click.argument(
+        "target",
+        type=click.Path(exists=False, file_okay=False, path_type=Path),
+        cls=FallbackArgument,
+        not_required_if="in_place",
+    ),
+]
+
+
+def scan_options(command: _Command) -> _Command:
+    """
+    Adds the options and arguments shared by the commands that parse a source
+    directory.
+    """
+    for option in reversed(_SCAN_OPTIONS):
+        command = option(command)
+    return command
+
+
+# Options controlling the output of the commands that copy or move files.
+_LOG_OPTIONS = [
+    click.option(
+        "--log-format",
+        type=click.Choice(["rich", "jsonl"]),
+        default="rich",
+        show_default=True,
+        help=(
+            "Format of the output: messages for a terminal (`rich`), or one JSON line "
+            "per operation holding its type, source, target, size and duration "
+            "(`jsonl`), the messages then being displayed on the standard error."
+        ),
+    ),
+    click.option(
+        "--log-file",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help=(
+            "With `--log-format=jsonl`, file to write the events to instead of the "
+            "standard output."
+        ),
+    ),
+]
+
+
+def log_options(command: _Command) -> _Command:
+    """
+    Adds the options controlling the output of the commands that copy or move files.
+    """
+    for option in reversed(_LOG_OPTIONS):
+        command = option(command)
+    return command
+
+
+# Options of the commands that copy or move files.
+_APPLY_OPTIONS = [
+    click.option(
+        "--link",
+        is_flag=True,
+        help=(
+            "Copies files as hard links to the source files when possible. Both then "
+            "share the same content, so modifying one modifies the other."
+        ),
+    ),
+    click.option(
+        "--dry-run",
+        is_flag=True,
+        help="Does not apply any filesystem operation, but logs what would be done.",
+    ),
+    click.option(
+        "--io-workers",
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help="Number of files copied or moved concurrently.",
+    ),
+]
+
+
+def apply_options(command: _Command) -> _Command:
+    """
+    Adds the options of the commands that copy or move files.
+    """
+    for option in reversed(_APPLY_OPTIONS):
+        command = option(command)
+    return command
+
+
+@contextmanager
+def configure_log(
+    verbose: bool, dry_run: bool, log_format: str, log_file: Optional[Path]
+) -> Iterator[None]:
+    """
+    Sets up the logger for the duration of a command, writing the events if
+    requested.
+    """
+    if log_format == "jsonl":
+        log.open_events(log_file)
+    # The events already describe every operation of a dry run.
+    if verbose or (dry_run and log_format == "rich"):
+        log.level = LogLevel.INFO
+    try:
+        yield
+    finally:
+        log.close_events()
+
+
+@click.group(cls=DefaultGroup, default_command="run")
+# The version is only looked up if requested.
+@click.version_option(package_name="tidysic")
 @click.option(
     "--dump-config",
     is_flag=True,
@@ -64,63 +270,355 @@ class FallbackArgument(click.Argument):
     is_eager=True,
     help="Dump the default config and exit.",
 )
+def cli() -> None:
+    """
+    Keep your music tidy.
+
+    Runs the `run` command unless another command is given.
+    """
+
+
+def check_cache_options(no_cache: bool, rebuild_cache: bool) -> None:
+    if no_cache and rebuild_cache:
+        raise click.UsageError(
+            "Illegal usage: `--no-cache` and `--rebuild-cache` are mutually exclusive."
+        )
+
+
+def parse_shard(
+    ctx: click.Context, param: click.Parameter, value: str
+) -> tuple[int, int]:
+    """
+    Parses a shard given as `K/N`, K being the index of the shard counted from 1, and
+    N the number of shards.
+    """
+    try:
+        index, shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise click.BadParameter("expected `K/N`, for instance `1/4`.")
+    if not 1 <= index <= shards:
+        raise click.BadParameter(f"shard {index} out of {shards}.")
+    return index - 1, shards
+
+
+@cli.command()
+@scan_options
+@apply_options
 @click.option(
-    "--config",
-    "config_path",
-    type=click.Path(exists=True, file_okay=True, path_type=Path),
-    help="Optional, path to a .tidysic config file.",
+    "--stream",
+    is_flag=True,
+    help=(
+        "Organizes the files of each folder as soon as it is parsed, rather than "
+        "parsing the whole source first. A collision then only aborts the remaining "
+        "operations."
+    ),
 )
 @click.option(
-    "--move/--copy", help="Defines which file operations to apply. Defaults to `copy`"
+    "--checkpoint",
+    is_flag=True,
+    help=(
+        "When streaming, records the folders organized so far into TARGET, so that an "
+        "interrupted run resumes where it stopped."
+    ),
 )
 @click.option(
-    "--dry-run",
+    "--async",
+    "asynchronous",
     is_flag=True,
-    help="Does not apply any filesystem operation, but logs what would be done.",
+    help=(
+        "Streams the folders through an asynchronous pipeline, parsing the next ones "
+        "while the files of the previous ones are copied or moved. Implies `--stream`."
+    ),
 )
 @click.option(
-    "--in-place",
-    is_eager=True,
+    "--journal",
     is_flag=True,
     help=(
-        "Sets the target folder to be the same as the source, and uses move operations "
-        "rather than copying the files. The TARGET argument must be omitted when using "
-        "this option."
+        "Records the operations into TARGET before applying them, and each applied "
+        "operation as it completes, so that an interrupted run resumes the remaining "
+        "operations without parsing the source again."
     ),
 )
-@click.argument(
-    "source",
-    type=click.Path(
-        exists=True,
-        file_okay=False,
-        path_type=Path,
+@click.option(
+    "--skip-unchanged",
+    type=click.Choice([comparison.value for comparison in Comparison]),
+    is_flag=False,
+    flag_value=Comparison.METADATA.value,
+    help=(
+        "Skips the copies whose target is already identical to their source. Files of "
+        "the same size are deemed identical if they have the same modification time "
+        "(`metadata`, the default), or the same hash of chunks sampled over their "
+        "content (`sampled`) or of their whole content (`full`)."
     ),
 )
-@click.argument(
-    "target",
-    type=click.Path(exists=False, file_okay=False, path_type=Path),
-    cls=FallbackArgument,
-    not_required_if="in_place",
+@click.option(
+    "--verify",
+    is_flag=True,
+    help="Same as `--skip-unchanged=full`.",
 )
+@log_options
 def run(
     verbose: bool,
     config_path: Optional[Path],
     dry_run: bool,
     in_place: bool,
     move: bool,
+    link: bool,
+    jobs: int,
+    io_workers: int,
+    no_cache: bool,
+    rebuild_cache: bool,
+    incremental: bool,
+    duplicates: Optional[str],
+    log_format: str,
+    log_file: Optional[Path],
+    stream: bool,
+    checkpoint: bool,
+    asynchronous: bool,
+    journal: bool,
+    skip_unchanged: Optional[str],
+    verify: bool,
+    on_collision: str,
     source: Path,
     target: Path,
 ) -> None:
+    """
+    Organizes the audio files of SOURCE into TARGET.
+    """
+    check_cache_options(no_cache, rebuild_cache)
+
     if in_place:
         target = source
         move = True
 
-    if verbose or dry_run:
+    if checkpoint and not (stream or asynchronous):
+        raise click.UsageError("Illegal usage: `--checkpoint` requires `--stream`.")
+
+    if duplicates is not None and (stream or asynchronous):
+        raise click.UsageError(
+            "Illegal usage: `--duplicates` and `--stream` are mutually exclusive."
+        )
+
+    if journal and (stream or asynchronous):
+        raise click.UsageError(
+            "Illegal usage: `--journal` and `--stream` are mutually exclusive."
+        )
+
+    if link and move:
+        raise click.UsageError("Illegal usage: `--link` only applies to copies.")
+
+    if verify:
+        skip_unchanged = Comparison.FULL.value
+    if skip_unchanged is not None and move:
+        raise click.UsageError(
+            "Illegal usage: `--skip-unchanged` only applies to copies."
+        )
+
+    from tidysic.tidysic import Tidysic
+
+    with configure_log(verbose, dry_run, log_format, log_file):
+        tidysic = Tidysic(
+            source,
+            target,
+            move,
+            dry_run,
+            config_path,
+            jobs,
+            use_cache=not no_cache,
+            rebuild_cache=rebuild_cache,
+            incremental=incremental,
+            stream=stream,
+            io_workers=io_workers,
+            link=link,
+            checkpoint=checkpoint,
+            asynchronous=asynchronous,
+            on_collision=CollisionPolicy(on_collision),
+            journal=journal,
+            skip_unchanged=(
+                None if skip_unchanged is None else Comparison(skip_unchanged)
+            ),
+            duplicates=None if duplicates is None else DuplicatePolicy(duplicates),
+        )
+        tidysic.run()
+
+
+@cli.command()
+@scan_options
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    required=True,
+    help="Path of the plan file to write.",
+)
+def plan(
+    verbose: bool,
+    config_path: Optional[Path],
+    in_place: bool,
+    move: bool,
+    jobs: int,
+    no_cache: bool,
+    rebuild_cache: bool,
+    incremental: bool,
+    duplicates: Optional[str],
+    on_collision: str,
+    source: Path,
+    target: Path,
+    output: Path,
+) -> None:
+    """
+    Parses SOURCE and writes the operations organizing it into TARGET to a plan file,
+    to be applied later by the `apply` command.
+    """
+    check_cache_options(no_cache, rebuild_cache)
+
+    if in_place:
+        target = source
+        move = True
+
+    if verbose:
         log.level = LogLevel.INFO
 
-    tidysic = Tidysic(source, target, move, dry_run, config_path)
-    tidysic.run()
+    from tidysic.tidysic import Tidysic
+
+    tidysic = Tidysic(
+        source,
+        target,
+        move,
+        False,
+        config_path,
+        jobs,
+        use_cache=not no_cache,
+        rebuild_cache=rebuild_cache,
+        incremental=incremental,
+        on_collision=CollisionPolicy(on_collision),
+        duplicates=None if duplicates is None else DuplicatePolicy(duplicates),
+    )
+    tidysic.plan(output)
+
+
+@cli.command()
+@click.option(
+    "-v", "--verbose", is_flag=True, help="Show more information when running."
+)
+@apply_options
+@click.option(
+    "--shard",
+    default="1/1",
+    show_default=True,
+    callback=parse_shard,
+    help=(
+        "Only applies the K-th of N shards of similar sizes the plan is split into, "
+        "given as `K/N`, so that several processes can apply it together."
+    ),
+)
+@log_options
+@click.argument(
+    "plan_path",
+    metavar="PLAN",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+def apply(
+    verbose: bool,
+    link: bool,
+    dry_run: bool,
+    io_workers: int,
+    shard: tuple[int, int],
+    log_format: str,
+    log_file: Optional[Path],
+    plan_path: Path,
+) -> None:
+    """
+    Applies the operations of a plan file written by the `plan` command.
+    """
+    from tidysic.tidysic import PlanApplier
+
+    with configure_log(verbose, dry_run, log_format, log_file):
+        applier = PlanApplier(plan_path, dry_run, io_workers, link, shard)
+        applier.run()
+
+
+@cli.command()
+@scan_options
+@apply_options
+@log_options
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=2.0,
+    show_default=True,
+    help=(
+        "Number of seconds a directory must stay unchanged before its new files are "
+        "organized, so that an album being copied is organized at once."
+    ),
+)
+@click.option(
+    "--poll-interval",
+    type=click.FloatRange(min=0, min_open=True),
+    help=(
+        "Lists SOURCE every given number of seconds to detect new files, instead of "
+        "relying on inotify, e.g. for network filesystems."
+    ),
+)
+def watch(
+    verbose: bool,
+    config_path: Optional[Path],
+    in_place: bool,
+    move: bool,
+    jobs: int,
+    no_cache: bool,
+    rebuild_cache: bool,
+    incremental: bool,
+    duplicates: Optional[str],
+    on_collision: str,
+    source: Path,
+    target: Path,
+    link: bool,
+    dry_run: bool,
+    io_workers: int,
+    log_format: str,
+    log_file: Optional[Path],
+    debounce: float,
+    poll_interval: Optional[float],
+) -> None:
+    """
+    Organizes SOURCE into TARGET, then keeps organizing the files landing in SOURCE
+    until interrupted.
+    """
+    check_cache_options(no_cache, rebuild_cache)
+
+    if in_place or target.resolve().is_relative_to(source.resolve()):
+        raise click.UsageError(
+            "Illegal usage: `watch` requires TARGET to be outside of SOURCE."
+        )
+    if incremental or duplicates is not None:
+        raise click.UsageError(
+            "Illegal usage: `--incremental` and `--duplicates` are not supported by "
+            "`watch`."
+        )
+    if link and move:
+        raise click.UsageError("Illegal usage: `--link` only applies to copies.")
+
+    from tidysic.tidysic import Watcher
+
+    with configure_log(verbose, dry_run, log_format, log_file):
+        watcher = Watcher(
+            source,
+            target,
+            move,
+            dry_run,
+            config_path,
+            jobs,
+            use_cache=not no_cache,
+            rebuild_cache=rebuild_cache,
+            io_workers=io_workers,
+            link=link,
+            on_collision=CollisionPolicy(on_collision),
+            debounce=debounce,
+            poll_interval=poll_interval,
+        )
+        watcher.run()
 
 
 if __name__ == "__main__":
-    run()
+    cli()
@@ -1,12 +1,40 @@
+import asyncio
+import errno
+import os
 import shutil
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
+from functools import cached_property
 from pathlib import Path
+from stat import S_ISDIR
+from typing import (
+    AsyncIterator,
+    Callable,
+    Container,
+    Iterable,
+    Iterator,
+    Optional,
+)
 
+from tidysic.checkpoint import Checkpoint
+from tidysic.collision import (
+    Collision,
+    find_collisions,
+    suffixed,
+)
+from tidysic.comparison import Comparator
+from tidysic.copy_backend import CopyBackend
 from tidysic.exceptions import CollisionException
 from tidysic.file.audio_file import AudioFile
 from tidysic.file.tagged_file import TaggedFile
-from tidysic.logger import Logger, Text
+from tidysic.history import History
+from tidysic.journal import Journal
+from tidysic.logger import Logger, Text, format_size
 from tidysic.parser import Tree
+from tidysic.plan import PlanEntry
+from tidysic.policies import CollisionPolicy
 from tidysic.settings.structure import Structure
 
 log = Logger()
@@ -18,49 +46,186 @@ class _Operation:
     file: TaggedFile
     target: Path
     dry_run: bool
+    renamed: bool = False
+    # Whether the target was found identical to the file, which was thus not copied.
+    skipped: bool = False
+    # Time spent applying the operation, in seconds.
+    duration: float = 0.0
+    # Index of the node the file belongs to when streaming, or of its entry when
+    # applying a plan.
+    node: int = 0
 
-    def copy(self) -> None:
-        log.info(
-            Text.assemble(
-                "Copying file ",
-                (self.file.path.name, "path"),
-                " to ",
-                (str(self.target), "path"),
-                ".",
+    @cached_property
+    def size(self) -> int:
+        """
+        Number of bytes to copy or move.
+        """
+        path = self.file.path
+        if path.is_dir():
+            return sum(
+                os.path.getsize(os.path.join(directory, name))
+                for directory, _, names in os.walk(path)
+                for name in names
             )
+        return self.file.get_stat().st_size
+
+    def _describe(self, action: str) -> Text:
+        return Text.assemble(
+            f"{action} file ",
+            (self.file.path.name, "path"),
+            " to ",
+            (str(self.target), "path"),
+            ".",
         )
-        if not self.dry_run:
-            self.target.parent.mkdir(parents=True, exist_ok=True)
-            if self.file.path.is_dir():
-                shutil.copytree(self.file.path, self.target)
-            else:
-                shutil.copyfile(self.file.path, self.target)
-
-    def move(self) -> None:
-        log.info(
-            Text.assemble(
-                "Moving file ",
-                (self.file.path.name, "path"),
-                " to ",
-                (str(self.target), "path"),
-                ".",
+
+    def copy(
+        self, backend: CopyBackend, comparator: Optional[Comparator] = None
+    ) -> None:
+        """
+        Copies the file. If a comparator is given, the targets it finds unchanged are
+        skipped.
+        """
+        directory = self.file.path.is_dir()
+        if (
+            not directory
+            and comparator is not None
+            and comparator.unchanged(self.file.path, self.target)
+        ):
+            self.skipped = True
+            log.info(
+                lambda: Text.assemble(
+                    "Skipping unchanged file ", (self.file.path.name, "path"), "."
+                )
             )
-        )
-        if not self.dry_run:
-            self.target.parent.mkdir(parents=True, exist_ok=True)
-            shutil.move(self.file.path, self.target)
+            return
+
+        log.info(lambda: self._describe("Copying"))
+        if self.dry_run:
+            return
+        if directory:
+            copy_function: Callable[[str, str], object] = backend.copy
+            if comparator is not None:
+                copy_function = comparator.copy_function(backend.copy)
+            shutil.copytree(
+                self.file.path,
+                self.target,
+                copy_function=copy_function,
+                dirs_exist_ok=comparator is not None,
+            )
+        else:
+            backend.copy(self.file.path, self.target)
+
+    def move(self, backend: CopyBackend, rename: bool) -> None:
+        """
+        Moves the file, either with a plain rename if `rename` is true, or by copying
+        it then deleting the source.
+
+        A rename falls back to a copy if the source and target turn out to be on
+        different filesystems, for instance across bind mounts.
+        """
+        log.info(lambda: self._describe("Moving"))
+        self.renamed = rename
+        if self.dry_run:
+            return
+
+        if rename:
+            try:
+                os.replace(self.file.path, self.target)
+                return
+            except OSError as error:
+                if error.errno != errno.EXDEV:
+                    raise
+                self.renamed = False
+
+        if self.file.path.is_dir():
+            shutil.copytree(
+                self.file.path, self.target, copy_function=backend.copy_with_stat
+            )
+            shutil.rmtree(self.file.path)
+        else:
+            backend.copy_with_stat(self.file.path, self.target)
+            os.unlink(self.file.path)
+
+
+class _Completion:
+    """
+    Tracks the nodes whose operations, and those of all previous nodes, are applied,
+    and records them into a checkpoint.
+    """
+
+    def __init__(self, checkpoint: Optional[Checkpoint]) -> None:
+        self._checkpoint = checkpoint
+        self._nodes: dict[int, Tree] = {}
+        self._remaining: dict[int, int] = {}
+        self._added = 0
+        self._completed = 0
+
+    def add(self, node: Tree, operations: list[_Operation]) -> None:
+        for operation in operations:
+            operation.node = self._added
+        self._nodes[self._added] = node
+        self._remaining[self._added] = len(operations)
+        self._added += 1
+        self._advance()
+
+    def complete(self, operation: _Operation) -> None:
+        self._remaining[operation.node] -= 1
+        self._advance()
+
+    def _advance(self) -> None:
+        while self._completed < self._added and self._remaining[self._completed] == 0:
+            node = self._nodes.pop(self._completed)
+            del self._remaining[self._completed]
+            if self._checkpoint is not None:
+                self._checkpoint.complete(node.root, node.common_tags)
+            self._completed += 1
 
 
 class Organizer:
     """
     Class that manages the actual tidying of the files.
     """
-    def __init__(self, structure: Structure, move: bool, dry_run: bool) -> None:
+    def __init__(
+        self,
+        structure: Structure,
+        move: bool,
+        dry_run: bool,
+        history: Optional[History] = None,
+        io_workers: int = 1,
+        link: bool = False,
+        on_collision: CollisionPolicy = CollisionPolicy.FAIL,
+        comparator: Optional[Comparator] = None,
+    ) -> None:
+        """
+        Args:
+            structure (Structure): Structure of the target directory.
+            move (bool): Whether to move the files rather than copying them.
+            dry_run (bool): Whether to only log the operations instead of applying
+                them.
+            history (Optional[History]): If given, files already organized to their
+                target and unchanged since are skipped, and the organized files are
+                recorded into it.
+            io_workers (int): Number of operations applied concurrently.
+            link (bool): Whether copies may be hard links to the source files.
+            on_collision (CollisionPolicy): How to handle files whose targets
+                collide.
+            comparator (Optional[Comparator]): If given, copies whose target it
+                finds identical to their source are skipped.
+        """
         self._structure = structure
         self._move = move
         self._dry_run = dry_run
+        self._history = history
+        self._io_workers = io_workers
+        self._backend = CopyBackend(link)
+        self._on_collision = on_collision
+        self._comparator = comparator
 
         self._operations: list[_Operation] = []
+        self._parents: dict[Path, int] = {}
+        self.statistics: Counter[str] = Counter()
+        # Directories from which files were moved away.
+        self.touched_directories: set[Path] = set()
 
     def organize(self, tree: Tree, target: Path) -> None:
         """
@@ -69,50 +234,488 @@ class Organizer:
         self._operations = []
         self._build_operations(tree, target)
 
-        self._handle_collisions()
+        self._resolve_collisions()
 
-        for operation in log.track(
-            self._operations,
-            description="Copying..." if self._move else "Moving...",
+        total = sum(operation.size for operation in self._operations)
+        with log.transfer(
+            total,
+            description="Moving..." if self._move else "Copying...",
             transient=True,
-        ):
-            if self._move:
-                operation.move()
-            else:
-                operation.copy()
+        ) as advance:
+            self._apply(self._operations, lambda operation: advance(operation.size))
+
+    def plan(self, tree: Tree, target: Path) -> list[PlanEntry]:
+        """
+        Computes the operations organizing the source files into the target directory,
+        without applying them.
+        """
+        self._operations = []
+        self._build_operations(tree, target)
+        self._resolve_collisions()
+        return [
+            PlanEntry(
+                operation.file.path,
+                operation.target,
+                operation.size,
+                operation.file.get_stat().st_mtime_ns,
+                index,
+            )
+            for index, operation in enumerate(self._operations)
+        ]
+
+    def apply_plan(
+        self, entries: Iterable[PlanEntry], journal: Optional[Journal] = None
+    ) -> None:
+        """
+        Applies the operations of a plan computed by `plan`, possibly by another
+        process. Sources that were removed or modified since are skipped.
+
+        If a journal is given, each applied operation is recorded into it.
+        """
+        self._operations = []
+
+        def on_complete(operation: _Operation) -> None:
+            if journal is not None:
+                journal.complete(operation.node)
+
+        self._apply(self._plan_operations(entries), on_complete)
+
+    def _plan_operations(self, entries: Iterable[PlanEntry]) -> Iterator[_Operation]:
+        for entry in entries:
+            try:
+                stat = entry.source.stat()
+            except FileNotFoundError:
+                if entry.target.exists():
+                    # Applied by an interrupted run, which did not record it.
+                    continue
+                log.warn(
+                    Text.assemble(
+                        "Skipped ", (str(entry.source), "path"), ", which was removed."
+                    )
+                )
+                continue
+            # Moving files out of a directory modifies it, so only files are checked.
+            modified = (stat.st_size, stat.st_mtime_ns) != (entry.size, entry.mtime_ns)
+            if modified and not S_ISDIR(stat.st_mode):
+                log.warn(
+                    Text.assemble(
+                        "Skipped ",
+                        (str(entry.source), "path"),
+                        ", which was modified since the plan was computed.",
+                    )
+                )
+                continue
+            file = TaggedFile(entry.source, stat)
+            yield _Operation(file, entry.target, self._dry_run, node=entry.index)
+
+    def organize_stream(
+        self,
+        nodes: Iterable[Tree],
+        target: Path,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        """
+        Copies or moves the files of each given node into the target directory as soon
+        as it is produced, for instance by `Tree.walk`, so that the tidying starts
+        before the whole source is parsed.
+
+        Collisions are checked against the targets of the previous nodes. Since these
+        were already organized, a collision only aborts the remaining operations.
+
+        If a checkpoint is given, each node is recorded as completed once its
+        operations and those of all previous nodes are applied. Given in post-order,
+        a node is thus only recorded after its whole subtree.
+        """
+        self._operations = []
+        targets: dict[Path, Path] = {}
+        completion = _Completion(checkpoint)
+
+        def operations() -> Iterator[_Operation]:
+            for node in nodes:
+                node_operations = self._check_stream_collisions(
+                    list(self._node_operations(node, target)), targets
+                )
+                completion.add(node, node_operations)
+                yield from node_operations
+
+        # The number of operations is unknown until the end, so there is no progress
+        # bar to display.
+        self._apply(operations(), completion.complete)
+
+    def _apply(
+        self,
+        operations: Iterable[_Operation],
+        on_complete: Callable[[_Operation], None],
+    ) -> None:
+        """
+        Applies the given operations using a pool of `io_workers` threads, calling
+        `on_complete` from the calling thread with each completed operation.
+
+        Parent directories are created once, before their first operation is
+        submitted. At most twice as many operations as workers are in flight, so that
+        a lazy iterable of operations is only consumed as fast as it is applied.
+        """
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self._io_workers) as executor:
+            pending: set[Future[_Operation]] = set()
+            try:
+                for operation in operations:
+                    if self._prepare(operation):
+                        # Renames only touch metadata, hence are not worth a thread.
+                        self._execute(operation, rename=True)
+                        self._complete(operation, on_complete)
+                        continue
+
+                    pending.add(executor.submit(self._execute, operation))
+                    if len(pending) >= 2 * self._io_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._complete(future.result(), on_complete)
+            finally:
+                # Operations in flight are applied regardless, so they are completed
+                # even if an error interrupts the submission.
+                done = wait(pending).done
+                for future in done:
+                    if future.exception() is None:
+                        self._complete(future.result(), on_complete)
+            for future in done:
+                future.result()
+
+        self._log_summary(start)
+
+    async def organize_async(
+        self,
+        nodes: AsyncIterator[Tree],
+        target: Path,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        """
+        Asynchronous counterpart of `organize_stream`, taking the nodes from an
+        asynchronous iterator.
+
+        Operations are handed over to `io_workers` tasks through a bounded queue, each
+        applying its operations in a thread, so that building the operations of the
+        next nodes is paused while the workers are busy.
+        """
+        self._operations = []
+        targets: dict[Path, Path] = {}
+        completion = _Completion(checkpoint)
+        queue: asyncio.Queue[Optional[_Operation]] = asyncio.Queue(
+            maxsize=2 * self._io_workers
+        )
+        errors: list[BaseException] = []
+        start = time.perf_counter()
+
+        workers = [
+            asyncio.create_task(self._work(queue, errors, completion.complete))
+            for _ in range(self._io_workers)
+        ]
+        try:
+            async for node in nodes:
+                if errors:
+                    # The remaining nodes are left once an operation failed.
+                    break
+                operations = self._check_stream_collisions(
+                    list(self._node_operations(node, target)), targets
+                )
+                completion.add(node, operations)
+                node.release()
+
+                for operation in operations:
+                    if errors:
+                        break
+                    if self._prepare(operation):
+                        self._execute(operation, rename=True)
+                        self._complete(operation, completion.complete)
+                    else:
+                        await queue.put(operation)
+        finally:
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+
+        if errors:
+            raise errors[0]
+        self._log_summary(start)
+
+    async def _work(
+        self,
+        queue: "asyncio.Queue[Optional[_Operation]]",
+        errors: list[BaseException],
+        on_complete: Callable[[_Operation], None],
+    ) -> None:
+        """
+        Applies the operations of the given queue in a thread until it yields `None`.
+        Once an operation failed, the remaining ones are only drained from the queue.
+        """
+        while (operation := await queue.get()) is not None:
+            if errors:
+                continue
+            try:
+                await asyncio.to_thread(self._execute, operation)
+                self._complete(operation, on_complete)
+            except BaseException as error:
+                errors.append(error)
+
+    def _prepare(self, operation: _Operation) -> bool:
+        """
+        Creates the parent directory of the target of the given operation if needed.
+
+        Returns:
+            bool: Whether the operation is a move within a single device, which can
+                thus be applied with a rename.
+        """
+        device = self._make_parent(operation.target.parent)
+        return self._move and self._source_device(operation) == device
+
+    def _complete(
+        self, operation: _Operation, on_complete: Callable[[_Operation], None]
+    ) -> None:
+        self._record(operation)
+        if self._move:
+            self.touched_directories.add(operation.file.path.parent)
+        if operation.skipped:
+            kind = "skipped"
+        elif not self._move:
+            kind = "copied"
+        elif operation.renamed:
+            kind = "renamed"
+        else:
+            kind = "transferred"
+        self.statistics[kind] += 1
+        self.statistics["bytes"] += operation.size
+        if log.events_enabled:
+            log.event(
+                op=kind,
+                source=str(operation.file.path),
+                target=str(operation.target),
+                bytes=operation.size,
+                duration=round(operation.duration, 6),
+                dry_run=self._dry_run,
+            )
+        on_complete(operation)
+
+    def _log_summary(self, start: float) -> None:
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        count = sum(
+            self.statistics[key] for key in ("copied", "renamed", "transferred")
+        )
+        size = self.statistics["bytes"]
+        if self._comparator is not None:
+            size -= self._comparator.skipped["bytes"]
+        log.info(
+            f"{'Moved' if self._move else 'Copied'} {count} file(s), "
+            f"{format_size(size)} in {elapsed:.2f} s "
+            f"({format_size(int(size / elapsed))}/s)."
+        )
+        self._log_statistics()
+        if self._comparator is not None:
+            skipped = self._comparator.skipped
+            log.info(
+                f"Skipped {skipped['files']} unchanged file(s), "
+                f"{format_size(skipped['bytes'])}."
+            )
+        self._backend.log_summary()
+
+    def _make_parent(self, parent: Path) -> int:
+        """
+        Creates the given directory unless it was already, and returns the device it is
+        on.
+        """
+        if parent not in self._parents:
+            if not self._dry_run:
+                parent.mkdir(parents=True, exist_ok=True)
+            existing = parent
+            while not existing.exists():
+                existing = existing.parent
+            self._parents[parent] = existing.stat().st_dev
+        return self._parents[parent]
+
+    @staticmethod
+    def _source_device(operation: _Operation) -> int:
+        return operation.file.get_stat().st_dev
+
+    def _execute(self, operation: _Operation, rename: bool = False) -> _Operation:
+        # Computed before a move makes the source vanish.
+        _ = operation.size
+        start = time.perf_counter()
+        if self._move:
+            operation.move(self._backend, rename)
+        else:
+            operation.copy(self._backend, self._comparator)
+        operation.duration = time.perf_counter() - start
+        return operation
+
+    def _log_statistics(self) -> None:
+        if self._move:
+            log.info(
+                f"Renamed {self.statistics['renamed']} file(s) within a filesystem, "
+                f"copied then deleted {self.statistics['transferred']} file(s) across "
+                "filesystems."
+            )
+
+    def _record(self, operation: _Operation) -> None:
+        if self._history is None or self._dry_run:
+            return
+        if self._move:
+            # The source is gone, and the moved file is the one found at its target
+            # by the next runs, for instance when organizing in place.
+            self._history.record(
+                operation.target, os.stat(operation.target), operation.target
+            )
+        else:
+            self._history.record(
+                operation.file.path, operation.file.get_stat(), operation.target
+            )
 
     def _build_operations(self, tree: Tree, target: Path) -> None:
+        for node in tree.nodes():
+            self._operations.extend(self._node_operations(node, target))
+
+    def _node_operations(self, tree: Tree, target: Path) -> Iterator[_Operation]:
+        """
+        Yields the operations of the files found directly in the given node.
+        """
         for file in tree.audio_files | tree.clutter_files:
             path = target / self._build_target_path(file)
-            self._operations.append(
-                _Operation(file=file, target=path, dry_run=self._dry_run)
-            )
-
-        for child in tree.children:
-            self._build_operations(child, target)
+            operation = _Operation(file=file, target=path, dry_run=self._dry_run)
+            if self._history is not None:
+                if self._history.is_placed(file.path, file.get_stat(), path):
+                    continue
+            yield operation
 
     def _build_target_path(self, tagged_file: TaggedFile) -> Path:
-        path = Path()
-        for step in self._structure.folders:
-            folder_name = step.formatted_string.write(tagged_file)
-            path /= folder_name
+        path = self._structure.folder_path(tagged_file)
         if isinstance(tagged_file, AudioFile):
             filename = (
                 self._structure.track_format.write(tagged_file) + tagged_file.extension
             )
         else:
             filename = tagged_file.path.name
-        path /= filename
-        return path
+        return path / filename
 
-    def _handle_collisions(self) -> None:
-        target_sources: dict[Path, list[TaggedFile]] = {}
-        for operation in self._operations:
-            if operation.target not in target_sources:
-                target_sources[operation.target] = []
-            target_sources[operation.target].append(operation.file)
+    def _resolve_collisions(self) -> None:
+        """
+        Finds every collision among the operations, and handles them according to the
+        collision policy.
+        """
+        collisions = self._find_collisions()
+        if not collisions:
+            return
+        first = collisions[0][0]
+        exception = CollisionException(
+            first.sources, first.target, [collision for collision, _ in collisions]
+        )
+        if self._on_collision is CollisionPolicy.FAIL:
+            raise exception
+        log.warn(exception.get_error_message())
+
+        if self._on_collision is CollisionPolicy.REPORT:
+            self._operations = []
+        elif self._on_collision is CollisionPolicy.SKIP:
+            skipped = {id(operation) for _, group in collisions for operation in group}
+            self._operations = [
+                operation
+                for operation in self._operations
+                if id(operation) not in skipped
+            ]
+        else:
+            taken = {operation.target for operation in self._operations}
+            for collision, group in collisions:
+                # The file organized by a previous run keeps its target.
+                renamed = group if len(collision.sources) > len(group) else group[1:]
+                for operation in renamed:
+                    taken.add(self._suffix(operation, taken))
+
+    def _find_collisions(self) -> list[tuple[Collision, list[_Operation]]]:
+        """
+        Returns every collision along with the operations involved, including
+        collisions with files organized by a previous run.
+        """
+        targets = [operation.target for operation in self._operations]
+        groups = find_collisions(targets)
+        if self._history is not None:
+            for index, target in enumerate(targets):
+                if target not in groups and self._history.owner(target) is not None:
+                    groups[target] = [index]
 
-        collision_causes = {k: v for (k, v) in target_sources.items() if len(v) > 1}
+        collisions = []
+        for target, indices in groups.items():
+            operations = [self._operations[index] for index in indices]
+            sources = [operation.file for operation in operations]
+            owner = self._history_owner(target, sources)
+            if owner is not None:
+                sources.insert(0, TaggedFile(owner))
+            if len(sources) > 1:
+                collisions.append((Collision(target, sources), operations))
+        return collisions
 
-        for target, sources in collision_causes.items():
-            raise CollisionException(sources, target)
+    def _suffix(self, operation: _Operation, taken: Container[Path]) -> Path:
+        """
+        Appends the first number to the target of the given operation that makes it
+        free, neither taken nor organized by a previous run, and returns it.
+        """
+        number = 2
+        while (target := suffixed(operation.target, number)) in taken or (
+            self._history is not None and self._history.owner(target) is not None
+        ):
+            number += 1
+        log.info(Text.assemble("Renamed colliding target to ", (str(target), "path")))
+        operation.target = target
+        return target
+
+    def _check_stream_collisions(
+        self, operations: list[_Operation], targets: dict[Path, Path]
+    ) -> list[_Operation]:
+        """
+        Checks the operations of a node against each other and against the given
+        targets of the previous nodes, which are then updated.
+
+        Files found at the target of a previous node were put there by this run, when
+        the target is inside the source, and are left in place.
+
+        Returns:
+            list[_Operation]: Operations to apply, according to the collision policy.
+        """
+        kept = []
+        for operation in operations:
+            if operation.file.path in targets:
+                continue
+            previous: Optional[Path] = targets.setdefault(
+                operation.target, operation.file.path
+            )
+            if previous == operation.file.path:
+                previous = self._history_owner(operation.target, [operation.file])
+            if previous is not None:
+                sources = [TaggedFile(previous), operation.file]
+                if self._on_collision is CollisionPolicy.FAIL:
+                    raise CollisionException(sources, operation.target)
+                log.warn(
+                    CollisionException.get_collision_message(
+                        Collision(operation.target, sources)
+                    )
+                )
+                if self._on_collision is not CollisionPolicy.SUFFIX:
+                    continue
+                targets[self._suffix(operation, targets)] = operation.file.path
+            kept.append(operation)
+
+        # Nothing is organized when only reporting.
+        return [] if self._on_collision is CollisionPolicy.REPORT else kept
+
+    def _history_owner(self, target: Path, sources: list[TaggedFile]) -> Optional[Path]:
+        """
+        Returns the file organized to the given target during a previous run, unless it
+        is one of the given sources.
+
+        Such files are not part of the operations, but still occupy their target.
+        """
+        if self._history is None:
+            return None
+        owner = self._history.owner(target)
+        if owner is None or any(
+            Path(os.path.abspath(source.path)) == owner for source in sources
+        ):
+            return None
+        return owner
@@ -1,14 +1,24 @@
+import errno
+import os
+from collections import Counter
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from itertools import chain
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
+from tidysic.checkpoint import Checkpoint
 from tidysic.file.audio_file import AudioFile
+from tidysic.file.tag_cache import TagCache
 from tidysic.file.taggable import Taggable
 from tidysic.file.tagged_file import TaggedFile
 from tidysic.logger import Logger, Text
 
 log = Logger()
 
+# Number of upcoming siblings listed ahead of the walk, by job, so that the executor
+# is kept busy without the files of a whole flat library being held at once.
+_LOOKAHEAD_PER_JOB = 2
+
 
 class Tree:
     """
@@ -18,7 +28,41 @@ class Tree:
     common to each of them.
     """
 
-    def __init__(self, root: Path) -> None:
+    def __init__(
+        self, root: Path, jobs: int = 1, cache: Optional[TagCache] = None
+    ) -> None:
+        """
+        Parses the given directory.
+
+        Args:
+            root (Path): Directory to parse.
+            jobs (int): Number of audio files whose tags are read concurrently.
+            cache (Optional[TagCache]): Cache from which the tags of unchanged files
+                are read, and into which newly read tags are stored.
+        """
+        self._init_node(root)
+
+        for _ in self.walk(jobs, cache, release=False):
+            pass
+
+    @classmethod
+    def unparsed(cls, root: Path) -> "Tree":
+        """
+        Returns the `Tree` of the given directory without parsing it, so that it can
+        be parsed progressively using `walk`.
+        """
+        tree = cls.__new__(cls)
+        tree._init_node(root)
+        return tree
+
+    @property
+    def root(self) -> Path:
+        """
+        Directory parsed by this node.
+        """
+        return self._root
+
+    def _init_node(self, root: Path) -> None:
         self._root = root
 
         self.children: set["Tree"] = set()
@@ -26,10 +70,162 @@ class Tree:
         self.clutter_files: set[TaggedFile] = set()
         self.common_tags: Optional[Taggable] = None
 
-        self._parse()
+        self._restored = False
+        self._scanned = False
+        self._subtrees: list["Tree"] = []
+        self._pending: list[Future[AudioFile]] = []
+
+    def walk(
+        self,
+        jobs: int = 1,
+        cache: Optional[TagCache] = None,
+        release: bool = True,
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> Iterator["Tree"]:
+        """
+        Parses an unparsed `Tree`, yielding each node containing audio files as soon
+        as it is complete, that is to say in post-order. The root is always yielded
+        last.
+
+        The traversal uses an explicit stack rather than recursion, so that it is not
+        limited by the depth of the hierarchy.
+
+        Args:
+            jobs (int): Number of audio files whose tags are read concurrently.
+            cache (Optional[TagCache]): Cache from which the tags of unchanged files
+                are read, and into which newly read tags are stored.
+            release (bool): If true, the files of each node are dropped once the
+                iteration resumes, so that only the skeleton of the tree is kept in
+                memory.
+            checkpoint (Optional[Checkpoint]): Record of the directories completed
+                during a previous run. These are neither walked nor yielded again, but
+                their common tags are restored.
+
+        Yields:
+            Tree: The complete nodes of the tree.
+        """
+        lookahead = _LOOKAHEAD_PER_JOB * jobs
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            self._list(executor, cache, checkpoint)
+
+            # Each frame holds a node, and the index of its next subtree to walk.
+            stack: list[tuple[Tree, int]] = [(self, 0)]
+            while stack:
+                node, index = stack.pop()
+                if node._restored:
+                    continue
+
+                if index < len(node._subtrees):
+                    # Listing the next siblings before descending keeps the executor
+                    # busy with their files while this subtree is being completed.
+                    for subtree in node._subtrees[index:index + lookahead]:
+                        subtree._list(executor, cache, checkpoint)
+                    stack.append((node, index + 1))
+                    stack.append((node._subtrees[index], 0))
+                    continue
+
+                node._adopt_subtrees()
+                node._resolve(cache)
+
+                if node.common_tags is not None or node is self:
+                    yield node
+
+                if release:
+                    node.release()
+
+    def release(self) -> None:
+        """
+        Drops the files of this node, once they are not needed anymore.
+        """
+        self.audio_files = set()
+        self.clutter_files = set()
+
+    def _adopt_subtrees(self) -> None:
+        """
+        Sorts the complete subtrees into children folders if they contain audio files,
+        or clutter files otherwise.
+        """
+        for subtree in self._subtrees:
+            if subtree.common_tags is not None:
+                self.children.add(subtree)
+            else:
+                self.clutter_files.add(TaggedFile(subtree._root))
+        self._subtrees = []
+
+    def _list(
+        self,
+        executor: Executor,
+        cache: Optional[TagCache],
+        checkpoint: Optional[Checkpoint] = None,
+    ) -> None:
+        """
+        Lists the `Tree`'s directory, submitting the reading of every audio file's tags
+        to the given executor, unless they are found in the cache.
+
+        The type of each entry is given by the listing itself, so that files are only
+        queried once, for a status kept on the resulting `TaggedFile`.
+        """
+        if self._restored or self._scanned:
+            return
+        self._scanned = True
+        with os.scandir(self._root) as entries:
+            for entry in entries:
+                if entry.name.startswith(".tidysic"):
+                    # Configuration and cache files of tidysic itself.
+                    continue
+                path = self._root / entry.name
+                if entry.is_dir():
+                    self._subtrees.append(Tree._listed(path, checkpoint))
+                elif entry.is_file() and path.suffix in AudioFile.extensions:
+                    stat = entry.stat()
+                    tags = None if cache is None else cache.get(path, stat)
+                    if tags is not None:
+                        self.audio_files.add(AudioFile(path, tags, stat))
+                    else:
+                        self._pending.append(
+                            executor.submit(AudioFile, path, None, stat)
+                        )
+                else:
+                    self.clutter_files.add(TaggedFile(path, self._clutter_stat(entry)))
+
+    @staticmethod
+    def _clutter_stat(entry: os.DirEntry[str]) -> os.stat_result:
+        try:
+            return entry.stat()
+        except OSError:
+            # A dangling symbolic link is clutter like any other file.
+            return entry.stat(follow_symlinks=False)
+
+    @classmethod
+    def _listed(cls, root: Path, checkpoint: Optional[Checkpoint]) -> "Tree":
+        """
+        Returns the unparsed `Tree` of a subdirectory, or its completed `Tree` with
+        its common tags if the checkpoint records it.
+        """
+        tree = cls.unparsed(root)
+        if checkpoint is not None:
+            completed, common_tags = checkpoint.get(root)
+            if completed:
+                tree.common_tags = common_tags
+                tree._restored = True
+        return tree
+
+    def _resolve(self, cache: Optional[TagCache]) -> None:
+        """
+        Completes the parsing of a listed `Tree` whose children are complete, collecting
+        its audio files and tagging its clutter.
+        """
+        for future in self._pending:
+            audio_file = future.result()
+            if cache is not None:
+                cache.put(audio_file.path, audio_file.get_stat(), audio_file)
+            self.audio_files.add(audio_file)
+        self._pending = []
+
+        self._tag_clutter()
 
         log.info(
-            [
+            lambda: [
                 Text.assemble("Parsed directory ", (str(self._root), "path"), "."),
                 f"Found {len(self.audio_files)} audio file(s).",
                 f"Found {len(self.children)} subfolder(s) containing audio files.",
@@ -37,26 +233,6 @@ class Tree:
             ]
         )
 
-    def _parse(self) -> None:
-        """
-        Parse the `Tree`, grouping each file in one of the three categories,
-        namely (i) a child folder, (ii) an audio file or (iii) a clutter file.
-        Children folders are recursively parsed.
-        """
-        for path in self._root.iterdir():
-            if path.is_dir():
-                child = Tree(path)
-                if child.common_tags is not None:
-                    self.children.add(child)
-                else:
-                    self.clutter_files.add(TaggedFile(path))
-            elif AudioFile.is_audio_file(path):
-                self.audio_files.add(AudioFile(path))
-            else:
-                self.clutter_files.add(TaggedFile(path))
-
-        self._tag_clutter()
-
     def _tag_clutter(self) -> None:
         """
         Tags non-audio files with the tags common to all audio files in the same
@@ -89,20 +265,96 @@ class Tree:
             for clutter_file in self.clutter_files:
                 clutter_file.copy_tags_from(self.common_tags)
 
+    def nodes(self) -> Iterator["Tree"]:
+        """
+        Yields the nodes of the `Tree`, parents before their children.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children)
+
     def clean_up(self) -> None:
         """
-        Traverse its children and removes any empty directory.
+        Removes the directories of the nodes that were emptied, children before their
+        parents.
 
         Running this will not result in the deletion of folders already empty before
         running the organizer, since these are considered clutter.
+
+        When the directories emptied are known, for instance from the operations of
+        the organizer, `remove_empty` only checks those instead of every node.
+        """
+        Tree.remove_empty((node._root for node in self.nodes()), self._root)
+
+    @staticmethod
+    def remove_empty(
+        directories: Iterable[Path], root: Path, keep_root: bool = False
+    ) -> Counter[str]:
+        """
+        Removes the given directories if they are empty, then their parents up to the
+        given root, for instance after their files were moved away without parsing
+        the whole tree again.
+
+        The directories are processed in a single pass, deepest first, so that every
+        directory is only removed once all its emptied subdirectories are, and no
+        directory is listed: removing a directory that is not empty simply fails.
+
+        If `keep_root` is true, the root itself is never removed.
+
+        Returns:
+            Counter[str]: Number of directories removed, and of directories checked,
+                removed or not.
+        """
+        statistics: Counter[str] = Counter()
+        checked: set[Path] = set()
+        gone: set[Path] = set()
+        # Directories may be given relative to another directory than the root.
+        root = Path(os.path.abspath(root))
+        absolute = {Path(os.path.abspath(directory)) for directory in directories}
+        # Sorting by decreasing depth yields every child before its parent.
+        for directory in sorted(absolute, key=lambda d: -len(d.parts)):
+            while (
+                directory not in gone
+                and directory.is_relative_to(root)
+                and not (keep_root and directory == root)
+            ):
+                checked.add(directory)
+                removed = Tree._remove_directory(directory)
+                if removed is None:
+                    break
+                gone.add(directory)
+                if removed:
+                    statistics["removed"] += 1
+                directory = directory.parent
+        statistics["checked"] = len(checked)
+        return statistics
+
+    @staticmethod
+    def _remove_directory(directory: Path) -> Optional[bool]:
         """
-        for child in self.children:
-            child.clean_up()
+        Removes the given directory if it is empty.
 
-        if not any(self._root.iterdir()):
-            self._root.rmdir()
-            log.info(
-                Text.assemble(
-                    "Deleted empty directory ", (self._root.name, "path"), "."
+        Returns:
+            Optional[bool]: Whether it was removed, False if it was already removed, for
+                instance by another process, and None if it is left in place.
+        """
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+                log.warn(
+                    Text.assemble(
+                        "Could not delete directory ",
+                        (str(directory), "path"),
+                        f": {e.strerror}.",
+                    )
                 )
-            )
+            return None
+        log.info(
+            Text.assemble("Deleted empty directory ", (directory.name, "path"), ".")
+        )
+        return True
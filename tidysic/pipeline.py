@@ -0,0 +1,82 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import AsyncGenerator, Optional, Union
+
+from tidysic.checkpoint import Checkpoint
+from tidysic.file.tag_cache import TagCache
+from tidysic.organizer import Organizer
+from tidysic.parser import Tree
+
+# Marks the end of the walk in the queue of nodes.
+_DONE = object()
+
+
+async def walk_async(
+    tree: Tree,
+    jobs: int = 1,
+    cache: Optional[TagCache] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    maxsize: int = 16,
+) -> AsyncGenerator[Tree, None]:
+    """
+    Walks an unparsed `Tree` in a background thread, yielding its nodes in the same
+    order as `Tree.walk`.
+
+    At most `maxsize` nodes are waiting to be consumed, so that the walk is paused
+    whenever the consumer falls behind. The walk is stopped as soon as the consumer
+    stops iterating.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue[Union[Tree, BaseException, object]] = asyncio.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(item: Union[Tree, BaseException, object]) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            for node in tree.walk(jobs, cache, release=False, checkpoint=checkpoint):
+                if stop.is_set():
+                    return
+                put(node)
+        except BaseException as error:
+            put(error)
+        else:
+            put(_DONE)
+
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while (item := await queue.get()) is not _DONE:
+            if isinstance(item, BaseException):
+                raise item
+            assert isinstance(item, Tree)
+            yield item
+    finally:
+        stop.set()
+        # Unblocks the producer if it is waiting for room in the queue.
+        while not producer.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.sleep(0)
+            await asyncio.wait([producer], timeout=0.01)
+
+
+async def run_pipeline(
+    tree: Tree,
+    organizer: Organizer,
+    target: Path,
+    jobs: int = 1,
+    cache: Optional[TagCache] = None,
+    checkpoint: Optional[Checkpoint] = None,
+    queue_size: int = 16,
+) -> None:
+    """
+    Organizes the given unparsed `Tree` into `target`, parsing its nodes while the
+    files of the previous ones are being copied or moved.
+    """
+    nodes = walk_async(tree, jobs, cache, checkpoint, queue_size)
+    try:
+        await organizer.organize_async(nodes, target, checkpoint)
+    finally:
+        await nodes.aclose()
@@ -0,0 +1,174 @@
+import os
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional
+
+from tidysic.exceptions import PlanException
+
+_MAGIC = b"TIDYPLAN"
+_VERSION = 1
+
+# Version, flags, number of entries, and lengths of the source and target roots.
+_HEADER = struct.Struct("<BBQII")
+
+# Lengths of the relative source and target paths, size and modification time.
+_ENTRY = struct.Struct("<HHqq")
+
+_MOVE = 0x01
+
+
+@dataclass
+class PlanEntry:
+    """
+    Single operation of a plan: the file to copy or move, and where to.
+
+    The size and modification time of the source are recorded when planning, so that
+    files modified since are detected when applying.
+    """
+
+    source: Path
+    target: Path
+    size: int
+    mtime_ns: int
+    # Position of the entry in its plan, once written.
+    index: int = field(default=0, compare=False)
+
+
+def _relative(path: Path, root: str) -> bytes:
+    return os.fsencode(os.path.relpath(os.path.abspath(path), root))
+
+
+class Plan:
+    """
+    Operations computed by a scan of the source, stored so that they can be applied
+    later without scanning again.
+
+    Plans are stored in a compact binary file: a header holding the source and target
+    roots, followed by one record per operation holding its paths relative to these
+    roots. Records are read one after the other, so that a plan is never loaded whole
+    in memory, and any range of them can be applied independently of the others.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Reads the header of the given plan file.
+
+        Args:
+            path (Path): Path of the plan file.
+
+        Raises:
+            PlanException: If the file is not a plan.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(_MAGIC)) != _MAGIC:
+                raise PlanException(path, "not a tidysic plan")
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise PlanException(path, "truncated header")
+            version, flags, self.count, source_size, target_size = _HEADER.unpack(
+                header
+            )
+            if version != _VERSION:
+                raise PlanException(path, f"unsupported version {version}")
+            self.move = bool(flags & _MOVE)
+            self.source = Path(os.fsdecode(file.read(source_size)))
+            self.target = Path(os.fsdecode(file.read(target_size)))
+            self._entries_offset = file.tell()
+
+    @staticmethod
+    def write(
+        path: Path,
+        source: Path,
+        target: Path,
+        entries: Iterable[PlanEntry],
+        count: int,
+        move: bool,
+        sync: bool = False,
+    ) -> None:
+        """
+        Writes the given entries as a plan file.
+
+        Args:
+            path (Path): Path of the plan file.
+            source (Path): Directory containing the sources of the entries.
+            target (Path): Directory containing the targets of the entries.
+            entries (Iterable[PlanEntry]): Operations of the plan.
+            count (int): Number of entries.
+            move (bool): Whether the files are to be moved rather than copied.
+            sync (bool): Whether to wait for the plan to be written to disk before
+                returning.
+        """
+        source_root = os.path.abspath(source)
+        target_root = os.path.abspath(target)
+        with open(path, "wb") as file:
+            file.write(_MAGIC)
+            file.write(
+                _HEADER.pack(
+                    _VERSION,
+                    _MOVE if move else 0,
+                    count,
+                    len(os.fsencode(source_root)),
+                    len(os.fsencode(target_root)),
+                )
+            )
+            file.write(os.fsencode(source_root))
+            file.write(os.fsencode(target_root))
+
+            written = 0
+            for entry in entries:
+                relative_source = _relative(entry.source, source_root)
+                relative_target = _relative(entry.target, target_root)
+                file.write(
+                    _ENTRY.pack(
+                        len(relative_source),
+                        len(relative_target),
+                        entry.size,
+                        entry.mtime_ns,
+                    )
+                )
+                file.write(relative_source)
+                file.write(relative_target)
+                written += 1
+            if written != count:
+                raise ValueError(f"expected {count} entries, got {written}")
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+
+    def shard(self, index: int, shards: int) -> range:
+        """
+        Returns the range of the entries of the given shard, when the plan is split
+        into the given number of shards of similar sizes.
+        """
+        if not 0 <= index < shards:
+            raise ValueError(f"shard {index} out of {shards}")
+        return range(self.count * index // shards, self.count * (index + 1) // shards)
+
+    def entries(
+        self, start: int = 0, stop: Optional[int] = None
+    ) -> Iterator[PlanEntry]:
+        """
+        Yields the entries of the plan whose index is in the given range.
+        """
+        stop = self.count if stop is None else min(stop, self.count)
+        with open(self.path, "rb") as file:
+            file.seek(self._entries_offset)
+            for index in range(stop):
+                header = self._read(file, _ENTRY.size)
+                source_size, target_size, size, mtime_ns = _ENTRY.unpack(header)
+                if index < start:
+                    file.seek(source_size + target_size, os.SEEK_CUR)
+                    continue
+                source = os.fsdecode(self._read(file, source_size))
+                target = os.fsdecode(self._read(file, target_size))
+                yield PlanEntry(
+                    self.source / source, self.target / target, size, mtime_ns, index
+                )
+
+    def _read(self, file: BinaryIO, size: int) -> bytes:
+        data = file.read(size)
+        if len(data) < size:
+            raise PlanException(self.path, "truncated entry")
+        return data
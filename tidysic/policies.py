@@ -0,0 +1,44 @@
+from enum import Enum
+
+# Kept free of dependencies, since the command line interface needs them to define its
+# options before running any command.
+
+
+class CollisionPolicy(Enum):
+    """
+    Ways of handling files whose targets collide.
+    """
+
+    # Aborts the tidying, reporting every collision.
+    FAIL = "fail"
+    # Leaves the colliding files where they are, and organizes the others.
+    SKIP = "skip"
+    # Appends a number to the name of each colliding file but the first.
+    SUFFIX = "suffix"
+    # Only reports the collisions, without organizing anything.
+    REPORT = "report"
+
+
+class Comparison(Enum):
+    """
+    Ways of telling that a target is already identical to its source, from the
+    fastest to the most reliable.
+    """
+
+    # Same size and modification time, like rsync does by default.
+    METADATA = "metadata"
+    # Same size and same hash of chunks sampled over the content.
+    SAMPLED = "sampled"
+    # Same size and same hash of the whole content.
+    FULL = "full"
+
+
+class DuplicatePolicy(Enum):
+    """
+    Ways of choosing which copy of a duplicated track to keep.
+    """
+
+    # Keeps the copy with the most tags, then the most recently modified one.
+    TAGGED = "tagged"
+    # Keeps the most recently modified copy.
+    NEWEST = "newest"
@@ -1,5 +1,6 @@
 import re
 from abc import ABC, abstractmethod
+from typing import Callable, Optional
 
 from tidysic.exceptions import EmptyStringException
 from tidysic.file.taggable import Taggable
@@ -7,12 +8,24 @@ from tidysic.logger import Logger
 
 log = Logger()
 
+_Writer = Callable[[Taggable], str]
+
+# Track numbers may be given along with the number of tracks, as in "3/12".
+_TRACK_NUMBER = re.compile(r"(\d+)/\d+")
+
 
 class _Unit(ABC):
     @abstractmethod
     def write(self, taggable: Taggable) -> str:
         pass
 
+    @abstractmethod
+    def compile(self) -> _Writer:
+        """
+        Returns a function equivalent to `write`, with everything that does not depend
+        on the taggable computed beforehand.
+        """
+
     @classmethod
     def create(cls, raw_string: str) -> "_Unit":
         try:
@@ -41,30 +54,68 @@ class _SubstitutableUnit(_Unit):
         if self.tag_name not in Taggable.get_tag_names():
             raise ValueError(f"unknown tag name [yellow]{self.tag_name}[/yellow].")
 
-    def write(self, taggable: Taggable) -> str:
-        value = self.get_value(taggable)
-        if value == "":
-            if self.is_required:
-                return f"Unknown {self.tag_name}"
-            else:
-                return ""
+        self._convert = self._compile_value()
+        self._write = self.compile()
 
-        return "".join((self.text_before, value, self.text_after))
+    def write(self, taggable: Taggable) -> str:
+        return self._write(taggable)
+
+    def compile(self) -> _Writer:
+        tag_name = self.tag_name
+        convert = self._convert
+        before = self.text_before
+        after = self.text_after
+        missing = f"Unknown {tag_name}" if self.is_required else ""
+
+        if convert is str:
+            # Values of tags are strings already.
+            def write_raw(taggable: Taggable) -> str:
+                value: Optional[str] = getattr(taggable, tag_name, None)
+                if not value:
+                    return missing
+                return before + value + after
+
+            return write_raw
+
+        def write(taggable: Taggable) -> str:
+            value = getattr(taggable, tag_name, None)
+            if value is None:
+                return missing
+            value = convert(value)
+            if value == "":
+                return missing
+            return before + value + after
+
+        return write
 
     def get_value(self, taggable: Taggable) -> str:
         value = getattr(taggable, self.tag_name, None)
         if value is None:
             return ""
-        else:
-            if self.tag_name in Taggable.get_numeric_tag_names():
-                if self.tag_name == "tracknumber":
-                    match = re.fullmatch(r"(\d+)/\d+", value)
-                    if match is not None:
-                        value = match.group(1)
-                value = int(value)
-            if self.format_spec is not None:
-                value = f"{{{self.format_spec}}}".format(value)
-            return str(value)
+        return self._convert(value)
+
+    def _compile_value(self) -> Callable[[str], str]:
+        """
+        Returns the function converting the raw value of the tag to its formatted
+        value.
+        """
+        format_value = (
+            str if self.format_spec is None else f"{{{self.format_spec}}}".format
+        )
+        if self.tag_name not in Taggable.get_numeric_tag_names():
+            return format_value
+
+        is_tracknumber = self.tag_name == "tracknumber"
+        match_track_number = _TRACK_NUMBER.fullmatch
+
+        def convert(value: str) -> str:
+            if is_tracknumber and "/" in value:
+                match = match_track_number(value)
+                if match is not None:
+                    value = match.group(1)
+            return format_value(int(value))
+
+        return convert
 
 
 class _TrivialUnit(_Unit):
@@ -74,6 +125,10 @@ class _TrivialUnit(_Unit):
     def write(self, taggable: Taggable) -> str:
         return self.string
 
+    def compile(self) -> _Writer:
+        string = self.string
+        return lambda taggable: string
+
 
 class FormattedString:
     """
@@ -88,6 +143,20 @@ class FormattedString:
         self._raw_string = raw_string
         self._units: list[_Unit] = []
         self._build_units()
+        self._writers = self._compile()
+
+    @property
+    def tag_names(self) -> tuple[str, ...]:
+        """
+        Names of the tags the string depends on, in order of appearance.
+        """
+        return tuple(
+            dict.fromkeys(
+                unit.tag_name
+                for unit in self._units
+                if isinstance(unit, _SubstitutableUnit)
+            )
+        )
 
     def _build_units(self) -> None:
         # Substitutable units are found by looking for exactly two sets of curly
@@ -98,11 +167,30 @@ class FormattedString:
         while split:
             self._units.append(_Unit.create(split.pop(0)))
 
+    def _compile(self) -> tuple[_Writer, ...]:
+        """
+        Compiles the units into the functions writing each part of the string, merging
+        consecutive constant units and dropping empty ones.
+        """
+        writers: list[_Writer] = []
+        constant = ""
+        for unit in self._units:
+            if isinstance(unit, _TrivialUnit):
+                constant += unit.string
+                continue
+            if constant:
+                writers.append(_TrivialUnit(constant).compile())
+                constant = ""
+            writers.append(unit.compile())
+        if constant:
+            writers.append(_TrivialUnit(constant).compile())
+        return tuple(writers)
+
     def write(self, taggable: Taggable) -> str:
         """
         Produces the string built using the tags found in the given taggable.
         """
-        return_string = "".join(unit.write(taggable) for unit in self._units)
+        return_string = "".join([write(taggable) for write in self._writers])
 
         if len(return_string) == 0:
             raise EmptyStringException(self._raw_string, taggable)
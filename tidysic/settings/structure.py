@@ -1,5 +1,7 @@
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
 
 from tidysic.exceptions import UnknownTagException
 from tidysic.file.taggable import Taggable
@@ -8,6 +10,9 @@ from tidysic.settings.formatted_string import FormattedString
 
 log = Logger()
 
+# Number of distinct folder paths remembered by a structure.
+_FOLDER_PATHS_SIZE = 4096
+
 
 @dataclass
 class StructureStep:
@@ -40,6 +45,38 @@ class Structure:
     folders: list[StructureStep]
     track_format: FormattedString
 
+    def __post_init__(self) -> None:
+        self._folder_tags = tuple(
+            dict.fromkeys(
+                tag
+                for step in self.folders
+                for tag in step.formatted_string.tag_names
+            )
+        )
+        self._folder_paths: OrderedDict[tuple[Optional[str], ...], Path] = (
+            OrderedDict()
+        )
+
+    def folder_path(self, taggable: Taggable) -> Path:
+        """
+        Returns the path of the folder a file with the given tags belongs in, relative
+        to the target of the tidying.
+
+        Paths are memoized on the values of the tags the steps read, so that the files
+        of a same album share a single path, rendered once.
+        """
+        key = tuple(getattr(taggable, tag) for tag in self._folder_tags)
+        path = self._folder_paths.get(key)
+        if path is not None:
+            self._folder_paths.move_to_end(key)
+            return path
+
+        path = Path(*(step.formatted_string.write(taggable) for step in self.folders))
+        self._folder_paths[key] = path
+        if len(self._folder_paths) > _FOLDER_PATHS_SIZE:
+            self._folder_paths.popitem(last=False)
+        return path
+
     @classmethod
     def get_default(cls) -> "Structure":
         """
@@ -75,7 +112,9 @@ class Structure:
         try:
             folders: list[StructureStep] = []
             for line in lines[:-1]:
-                log.info(Text.assemble("Parsing config line ", (line, "config"), "."))
+                log.info(
+                    lambda: Text.assemble("Parsing config line ", (line, "config"), ".")
+                )
                 components = line.split(" ", maxsplit=1)
                 if len(components) == 1:
                     raise ValueError("expected tag name followed by format")
@@ -86,7 +125,11 @@ class Structure:
                 folders.append(StructureStep(tag, formatted_string))
 
             track_line = lines[-1]
-            log.info(Text.assemble("Parsing config line ", (track_line, "config"), "."))
+            log.info(
+                lambda: Text.assemble(
+                    "Parsing config line ", (track_line, "config"), "."
+                )
+            )
             track_format = FormattedString(track_line)
 
             return cls(folders=folders, track_format=track_format)
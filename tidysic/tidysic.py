@@ -1,10 +1,45 @@
+import asyncio
+import os
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Type, TypeVar
 
-from tidysic.exceptions import log_and_exit_on_exception
+from tidysic.checkpoint import Checkpoint
+from tidysic.comparison import Comparator
+from tidysic.duplicates import remove_duplicates
+from tidysic.exceptions import (
+    PlanException,
+    TidysicException,
+    log_and_exit_on_exception,
+)
+from tidysic.file.hash_cache import HashCache
+from tidysic.file.tag_cache import TagCache
+from tidysic.history import History
+from tidysic.journal import Journal
+from tidysic.logger import Logger, LogLevel, Text
 from tidysic.organizer import Organizer
 from tidysic.parser import Tree
+from tidysic.pipeline import run_pipeline
+from tidysic.plan import Plan
+from tidysic.policies import CollisionPolicy, Comparison, DuplicatePolicy
 from tidysic.settings.structure import Structure
+from tidysic.watch import watch_directories
+
+log = Logger()
+
+_Database = TypeVar("_Database", TagCache, History, Checkpoint, HashCache)
+
+
+def _open_database(cls: Type[_Database], directory: Path, dry_run: bool) -> _Database:
+    """
+    Opens the database of the given type stored in the given directory. During a dry
+    run, an existing database is only read, and neither the directory nor the
+    database are created: the changes only live in memory.
+    """
+    if dry_run:
+        return cls(directory / cls.filename, read_only=True)
+    directory.mkdir(parents=True, exist_ok=True)
+    return cls(directory / cls.filename)
 
 
 @log_and_exit_on_exception
@@ -20,20 +55,409 @@ class Tidysic:
         target: Path,
         move: bool,
         dry_run: bool,
-        settings_path: Optional[Path]
+        settings_path: Optional[Path],
+        jobs: int = 1,
+        use_cache: bool = True,
+        rebuild_cache: bool = False,
+        incremental: bool = False,
+        stream: bool = False,
+        io_workers: int = 1,
+        link: bool = False,
+        checkpoint: bool = False,
+        asynchronous: bool = False,
+        on_collision: CollisionPolicy = CollisionPolicy.FAIL,
+        journal: bool = False,
+        skip_unchanged: Optional[Comparison] = None,
+        duplicates: Optional[DuplicatePolicy] = None,
     ) -> None:
-        self._tree = Tree(source)
+        self._source = source
         self._target = target
+        self._move = move
+        self._dry_run = dry_run
+        self._resumed_directories: set[Path] = set()
+        self._jobs = jobs
+        # The asynchronous pipeline streams the nodes as well.
+        self._stream = stream or asynchronous
+        self._asynchronous = asynchronous
+
+        self._checkpoint = None
+        if checkpoint:
+            assert self._stream, "checkpoints are only supported when streaming"
+            self._checkpoint = (
+                Checkpoint(None)
+                if dry_run
+                else _open_database(Checkpoint, self._target, False)
+            )
+
+        self._journal = self._open_journal() if journal and not dry_run else None
+        # Resuming from a journal does not need to parse the source.
+        resumed = self._journal.plan if self._journal is not None else None
+        if resumed is not None:
+            self._check_resumed(resumed, move)
+        self._parsed = resumed is None
 
         if not settings_path:
             settings_path = self._target / ".tidysic"
 
+        self._cache = None
+        if use_cache:
+            self._cache = _open_database(TagCache, settings_path.parent, dry_run)
+            if rebuild_cache:
+                self._cache.clear()
+
+        if self._stream or resumed is not None:
+            # Parsed progressively while running, or not at all.
+            self._tree = Tree.unparsed(source)
+        else:
+            self._tree = self._parse(jobs, duplicates)
+
+        self._history = None
+        if incremental:
+            self._history = _open_database(History, self._target, dry_run)
+
+        self._hashes: Optional[HashCache] = None
+        comparator = self._open_comparator(skip_unchanged, dry_run)
+
         structure = Structure.build(settings_path)
-        self._organizer = Organizer(structure, move, dry_run)
+        self._organizer = Organizer(
+            structure,
+            move,
+            dry_run,
+            self._history,
+            io_workers,
+            link,
+            on_collision,
+            comparator,
+        )
 
     def run(self) -> None:
         """
         Runs the tidying.
         """
-        self._organizer.organize(self._tree, self._target)
-        self._tree.clean_up()
+        finished = False
+        try:
+            if self._asynchronous:
+                asyncio.run(
+                    run_pipeline(
+                        self._tree,
+                        self._organizer,
+                        self._target,
+                        self._jobs,
+                        self._cache,
+                        self._checkpoint,
+                    )
+                )
+            elif self._journal is not None:
+                self._run_journal(self._journal)
+            elif self._stream:
+                nodes = self._tree.walk(
+                    self._jobs, self._cache, checkpoint=self._checkpoint
+                )
+                self._organizer.organize_stream(nodes, self._target, self._checkpoint)
+            else:
+                self._organizer.organize(self._tree, self._target)
+            if self._stream and self._cache is not None:
+                self._cache.prune(self._source)
+            finished = True
+        finally:
+            self._close_cache()
+            if self._history is not None:
+                self._history.close()
+            if self._hashes is not None:
+                self._hashes.close()
+            if self._checkpoint is not None:
+                self._checkpoint.close(finished)
+            if self._journal is not None:
+                self._journal.close(finished)
+        self._clean_up()
+
+    def _clean_up(self) -> None:
+        """
+        Removes the source directories emptied by moving their files away. Only the
+        directories files were moved from are checked, rather than every directory of
+        the source.
+        """
+        if not self._move or self._dry_run:
+            return
+        statistics = Tree.remove_empty(
+            self._organizer.touched_directories | self._resumed_directories,
+            self._source,
+        )
+        # Counting the parsed directories is only worth it if the count is displayed.
+        if not log.is_enabled(LogLevel.INFO):
+            return
+        message = (
+            f"Deleted {statistics['removed']} empty directory(ies) after checking "
+            f"{statistics['checked']}"
+        )
+        if self._parsed:
+            message += f" of the {sum(1 for _ in self._tree.nodes())} parsed ones"
+        log.info(message + ".")
+
+    def _parse(self, jobs: int, duplicates: Optional[DuplicatePolicy]) -> Tree:
+        """
+        Parses the whole source, leaving out the duplicated tracks if a policy is
+        given for them.
+        """
+        try:
+            tree = Tree(self._source, jobs, self._cache)
+            if self._cache is not None:
+                self._cache.prune(self._source)
+        finally:
+            self._close_cache()
+        if duplicates is not None:
+            remove_duplicates(tree, duplicates, jobs)
+        return tree
+
+    def _open_comparator(
+        self, comparison: Optional[Comparison], dry_run: bool
+    ) -> Optional[Comparator]:
+        if comparison is None:
+            return None
+        # Only hashes are worth caching.
+        if comparison is not Comparison.METADATA:
+            self._hashes = _open_database(HashCache, self._target, dry_run)
+        return Comparator(comparison, self._hashes, dry_run)
+
+    def _open_journal(self) -> Journal:
+        assert not self._stream, "journals are only supported when parsing the tree"
+        self._target.mkdir(parents=True, exist_ok=True)
+        return Journal(self._target / Journal.filename)
+
+    def _check_resumed(self, plan: Plan, move: bool) -> None:
+        """
+        Refuses to resume a journal recorded by a run with other arguments, which
+        would otherwise be silently replaced by those of the journal.
+        """
+        assert self._journal is not None
+        if plan.source != Path(os.path.abspath(self._source)) or plan.move != move:
+            raise PlanException(
+                self._journal.path,
+                f"it records the {'move' if plan.move else 'copy'} of {plan.source}, "
+                "which was interrupted: resume it with the same arguments, or delete "
+                "it to start over",
+            )
+
+    def _run_journal(self, journal: Journal) -> None:
+        """
+        Applies the operations recorded in the journal, after recording them if the
+        journal is new.
+        """
+        if journal.plan is None:
+            entries = self._organizer.plan(self._tree, self._target)
+            journal.start(self._source, self._target, entries, self._move)
+            self._organizer.apply_plan(entries, journal)
+            return
+
+        self._organizer.apply_plan(journal.pending(), journal)
+        if journal.plan.move:
+            # The source was not parsed, so the directories emptied by this run and
+            # the interrupted one are only known from the journal.
+            self._resumed_directories = {
+                entry.source.parent for entry in journal.plan.entries()
+            }
+
+    def plan(self, output: Path) -> None:
+        """
+        Computes the operations of the tidying and writes them to the given plan file,
+        to be applied later by `PlanApplier`.
+        """
+        assert not self._stream, "plans are only supported when parsing the whole tree"
+        try:
+            entries = self._organizer.plan(self._tree, self._target)
+        finally:
+            if self._history is not None:
+                self._history.close()
+        Plan.write(
+            output, self._source, self._target, entries, len(entries), self._move
+        )
+        log.info(
+            Text.assemble(
+                f"Planned {len(entries)} operation(s) into ", (str(output), "path"), "."
+            )
+        )
+
+    def _close_cache(self) -> None:
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+
+
+@log_and_exit_on_exception
+class PlanApplier:
+    """
+    Applies a plan written by `Tidysic.plan`, without parsing the source again.
+
+    A plan can be split into shards, each applied by a distinct process, possibly on a
+    distinct machine sharing the same filesystems.
+    """
+    def __init__(
+        self,
+        plan_path: Path,
+        dry_run: bool,
+        io_workers: int = 1,
+        link: bool = False,
+        shard: tuple[int, int] = (0, 1),
+    ) -> None:
+        """
+        Args:
+            plan_path (Path): Path of the plan file.
+            dry_run (bool): Whether to only log the operations instead of applying
+                them.
+            io_workers (int): Number of operations applied concurrently.
+            link (bool): Whether copies may be hard links to the source files.
+            shard (tuple[int, int]): Index of the shard to apply, and number of
+                shards the plan is split into.
+        """
+        self._plan = Plan(plan_path)
+        self._dry_run = dry_run
+        self._range = self._plan.shard(*shard)
+        # A plan computed with `incremental` left the history of its target, which
+        # must record the files placed, so that the next plans leave them out.
+        self._history = None
+        if (self._plan.target / History.filename).exists():
+            self._history = _open_database(History, self._plan.target, dry_run)
+        # The targets are already computed, so the structure is never used.
+        self._organizer = Organizer(
+            Structure.get_default(),
+            self._plan.move,
+            dry_run,
+            self._history,
+            io_workers,
+            link,
+        )
+
+    def run(self) -> None:
+        """
+        Applies the operations of the shard.
+        """
+        try:
+            self._organizer.apply_plan(
+                self._plan.entries(self._range.start, self._range.stop)
+            )
+        finally:
+            if self._history is not None:
+                self._history.close()
+        if not self._dry_run:
+            Tree.remove_empty(self._organizer.touched_directories, self._plan.source)
+
+
+@log_and_exit_on_exception
+class Watcher:
+    """
+    Stays resident, organizing the files landing in the source directory as they are
+    added, until stopped.
+
+    The structure is compiled and the tag cache opened once. Each time files land in
+    a directory, only its subtree is parsed again, once it stayed unchanged for a
+    while, so that the files of an album are organized together.
+    """
+    def __init__(
+        self,
+        source: Path,
+        target: Path,
+        move: bool,
+        dry_run: bool,
+        settings_path: Optional[Path],
+        jobs: int = 1,
+        use_cache: bool = True,
+        rebuild_cache: bool = False,
+        io_workers: int = 1,
+        link: bool = False,
+        on_collision: CollisionPolicy = CollisionPolicy.FAIL,
+        debounce: float = 2.0,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            debounce (float): Number of seconds a directory must stay unchanged
+                before being organized.
+            poll_interval (Optional[float]): If given, the source is listed every
+                `poll_interval` seconds instead of relying on inotify.
+
+        See `Tidysic` for the other arguments.
+        """
+        self._source = source
+        self._target = target
+        self._move = move
+        self._dry_run = dry_run
+        self._jobs = jobs
+        self._io_workers = io_workers
+        self._link = link
+        self._on_collision = on_collision
+        self._debounce = debounce
+        self._poll_interval = poll_interval
+        self._stop = threading.Event()
+
+        if not settings_path:
+            settings_path = self._target / ".tidysic"
+        self._structure = Structure.build(settings_path)
+        self._cache = None
+        if use_cache:
+            self._cache = _open_database(TagCache, settings_path.parent, dry_run)
+            if rebuild_cache:
+                self._cache.clear()
+
+    def run(self) -> None:
+        """
+        Organizes the whole source, then the directories in which files land, until
+        interrupted or stopped.
+        """
+        try:
+            log.info(Text.assemble("Watching ", (str(self._source), "path"), "..."))
+            for directories in watch_directories(
+                self._source, self._debounce, self._stop, self._poll_interval
+            ):
+                for directory in sorted(directories):
+                    self._organize(directory)
+                if self._cache is not None:
+                    self._cache.commit()
+                log.flush_events()
+        except KeyboardInterrupt:
+            log.info("Stopped watching.")
+        finally:
+            if self._cache is not None:
+                self._cache.close()
+
+    def stop(self) -> None:
+        """
+        Stops the watching, for instance from another thread.
+        """
+        self._stop.set()
+
+    def _organize(self, directory: Path) -> None:
+        """
+        Parses the given directory and organizes its files. A failure, such as a
+        collision or a file removed since it landed, is logged without stopping the
+        watching.
+        """
+        if not directory.is_dir():
+            # Removed since it changed.
+            return
+        # Copies are skipped when already organized, since new files landing in a
+        # directory make the files organized before parsed again.
+        comparator = None if self._move else Comparator(Comparison.METADATA)
+        organizer = Organizer(
+            self._structure,
+            self._move,
+            self._dry_run,
+            None,
+            self._io_workers,
+            self._link,
+            self._on_collision,
+            comparator,
+        )
+        try:
+            organizer.organize(Tree(directory, self._jobs, self._cache), self._target)
+        except TidysicException as e:
+            log.error(e.get_error_message())
+        except OSError as e:
+            log.error(
+                Text.assemble(
+                    "Could not organize ", (str(directory), "path"), f": {e}."
+                )
+            )
+        if self._move and not self._dry_run:
+            Tree.remove_empty(
+                organizer.touched_directories, self._source, keep_root=True
+            )
@@ -0,0 +1,241 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Protocol
+
+from tidysic.logger import Logger, Text
+
+log = Logger()
+
+# Flags of the inotify API, from <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_ONLYDIR = 0x01000000
+# Only files that are complete are worth organizing, so files being written are
+# only reported once closed.
+_MASK = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_ONLYDIR
+
+# Watch descriptor, mask, cookie and length of the name of an event.
+_EVENT = struct.Struct("iIII")
+
+_BUFFER_SIZE = 64 * 1024
+
+# Longest wait for changes, so that a request to stop is noticed.
+_STOP_INTERVAL = 0.5
+
+
+class _Events(Protocol):
+    def read(self, timeout: float) -> set[Path]:
+        """
+        Waits for changes for at most the given number of seconds, and returns the
+        directories in which files were added or modified.
+        """
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class _Inotify:
+    """
+    Reports the changes under a directory using the inotify API of Linux, through
+    ctypes.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        file_descriptor: int = self._libc.inotify_init1(os.O_CLOEXEC)
+        if file_descriptor < 0:
+            raise OSError(ctypes.get_errno(), "inotify is unavailable")
+        self._file_descriptor = file_descriptor
+        self._directories: dict[int, Path] = {}
+        self._add(root)
+
+    def _add(self, root: Path) -> None:
+        """
+        Watches the given directory and all its subdirectories.
+        """
+        for directory, _, _ in os.walk(root):
+            descriptor: int = self._libc.inotify_add_watch(
+                self._file_descriptor, os.fsencode(directory), _MASK
+            )
+            if descriptor < 0:
+                # Removed since it was listed, or out of watches.
+                log.warn(
+                    Text.assemble(
+                        "Could not watch ",
+                        (directory, "path"),
+                        f": {os.strerror(ctypes.get_errno())}.",
+                    )
+                )
+                continue
+            self._directories[descriptor] = Path(directory)
+
+    def read(self, timeout: float) -> set[Path]:
+        readable, _, _ = select.select([self._file_descriptor], [], [], timeout)
+        if not readable:
+            return set()
+        data = os.read(self._file_descriptor, _BUFFER_SIZE)
+
+        changed: set[Path] = set()
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length]
+            offset += length
+
+            if mask & _IN_IGNORED:
+                # The directory was removed.
+                self._directories.pop(descriptor, None)
+                continue
+            directory = self._directories.get(descriptor)
+            if directory is None:
+                continue
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # Its files may have landed before it is watched.
+                    subdirectory = directory / os.fsdecode(name.rstrip(b"\0"))
+                    self._add(subdirectory)
+                    changed.add(subdirectory)
+            elif mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                changed.add(directory)
+        return changed
+
+    def close(self) -> None:
+        os.close(self._file_descriptor)
+
+
+class _Poller:
+    """
+    Reports the changes under a directory by listing it periodically, where inotify is
+    unavailable.
+    """
+
+    def __init__(self, root: Path, interval: float) -> None:
+        self._root = root
+        self._interval = interval
+        self._snapshot = self._scan()
+        self._scanned = time.monotonic()
+
+    def _scan(self) -> dict[Path, dict[str, tuple[int, int]]]:
+        """
+        Returns the size and modification time of every file under the root, by
+        directory.
+        """
+        snapshot: dict[Path, dict[str, tuple[int, int]]] = {}
+        for directory, _, names in os.walk(self._root):
+            files: dict[str, tuple[int, int]] = {}
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except FileNotFoundError:
+                    continue
+                files[name] = (stat.st_size, stat.st_mtime_ns)
+            snapshot[Path(directory)] = files
+        return snapshot
+
+    def read(self, timeout: float) -> set[Path]:
+        remaining = self._scanned + self._interval - time.monotonic()
+        if remaining > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(remaining, 0))
+        snapshot = self._scan()
+        self._scanned = time.monotonic()
+        # Files removed since the previous scan, for instance by moving them to the
+        # target, do not make a directory changed.
+        changed = {
+            directory
+            for directory, files in snapshot.items()
+            if any(
+                self._snapshot.get(directory, {}).get(name) != stamp
+                for name, stamp in files.items()
+            )
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def _open_events(root: Path, poll_interval: Optional[float]) -> _Events:
+    if poll_interval is None:
+        try:
+            return _Inotify(root)
+        except (OSError, AttributeError):
+            # Either the C library has no inotify functions, or their limits are
+            # reached.
+            poll_interval = 5.0
+            log.warn(f"inotify is unavailable, polling every {poll_interval} s.")
+    return _Poller(root, poll_interval)
+
+
+def watch_directories(
+    root: Path,
+    debounce: float,
+    stop: threading.Event,
+    poll_interval: Optional[float] = None,
+) -> Iterator[set[Path]]:
+    """
+    Watches the given directory, and yields batches of the directories in which files
+    were added or modified, each once no file changed in it for `debounce` seconds, so
+    that an album being copied is only reported once complete.
+
+    The first batch is the root itself, yielded once the watching started, so that no
+    file landing while the files already there are organized is missed.
+
+    Directories with an ancestor reported in the same batch are left out, since
+    organizing the ancestor organizes them as well.
+
+    Args:
+        root (Path): Directory to watch, along with all its subdirectories.
+        debounce (float): Number of seconds a directory must stay unchanged before
+            being reported.
+        stop (threading.Event): Stops the watching once set.
+        poll_interval (Optional[float]): If given, the directory is listed every
+            `poll_interval` seconds instead of relying on inotify.
+
+    Yields:
+        set[Path]: Directories to organize.
+    """
+    events = _open_events(root, poll_interval)
+    # Time of the last change of each directory, by directory.
+    changes: dict[Path, float] = {}
+    try:
+        yield {root}
+        while not stop.is_set():
+            now = time.monotonic()
+            timeout = min(
+                (last + debounce - now for last in changes.values()),
+                default=_STOP_INTERVAL,
+            )
+            changed = events.read(max(min(timeout, _STOP_INTERVAL), 0))
+            now = time.monotonic()
+            changes.update((directory, now) for directory in changed)
+
+            ready = {
+                directory
+                for directory, last in changes.items()
+                if now - last >= debounce
+            }
+            if not ready:
+                continue
+            for directory in ready:
+                del changes[directory]
+            yield {
+                directory
+                for directory in ready
+                if not any(parent in ready for parent in directory.parents)
+            }
+    finally:
+        events.close()